@@ -1,23 +1,41 @@
 from __future__ import annotations
 
 import argparse
+import ctypes
 import logging
+import queue
+import sys
 import threading
 import time
-import ctypes
-import tkinter as tk
+from collections import OrderedDict
+from typing import Iterable
 
-from commands import handle_command, parse_intent
 from config import configure_logging, load_settings
-from leviathan_brain import leviathan_reply
-from overlay import clear_state, write_context, write_state, read_gamestate, read_gamestate_log
+from leviathan_brain import leviathan_reply, leviathan_reply_stream
+from overlay import FileChangeNotifier, GamestateLogTail, OverlayWriter, clear_state, write_context
 from overlay.server import start_overlay_server
-from stt import record_push_to_talk, transcribe_auto
-from tts import speak, stream_speech
-import keyboard  # type: ignore
+from stt import load_whisper_model, record_push_to_talk, transcribe_auto
+from tts import prefetch_speech, speak, stream_speech
 
 logger = logging.getLogger("cli")
 SPEECH_LOCK = threading.Lock()
+# (line, overlay text, stream, epoch) items consumed by the speech worker thread.
+SPEECH_QUEUE: queue.Queue[tuple[str, str, bool, int]] = queue.Queue()
+# Bumped on barge-in; queued lines from an older epoch are dropped unspoken.
+_SPEECH_EPOCH = 0
+_EPOCH_LOCK = threading.Lock()
+# Announcement prompts handed from the gamestate watcher to the announcer thread.
+ANNOUNCE_QUEUE: queue.Queue[str] = queue.Queue(maxsize=8)
+# Hash of the last (title, selection) written to context.json; repeats are skipped.
+_LAST_CTX_HASH: int | None = None
+
+GAMESTATE_LOG_PATH = "overlay/gamestate.log"
+GAMESTATE_QUIET_PERIOD = 0.2  # seconds without new events before announcing a burst
+GAMESTATE_MAX_DRAIN = 2.0  # cap on how long a continuous burst can delay the announcement
+ANNOUNCED_IDS_MAX = 1024
+CF_UNICODETEXT = 13
+GAMESTATE_IDLE_RECHECK = 5.0  # safety re-read in case a change notification is missed
+WATCHER_ERROR_LOG_INTERVAL = 60.0  # log repeated watcher errors at most this often
 
 
 def main() -> None:
@@ -80,6 +98,8 @@ def main() -> None:
         help="Override log level (e.g., DEBUG, INFO).",
     )
     args = parser.parse_args()
+    # Computed once; the overlay helpers below run on every turn and event.
+    args.overlay_is_json = bool(args.overlay_path) and str(args.overlay_path).lower().endswith(".json")
 
     configure_logging(args.log_level)
     settings = load_settings()
@@ -91,19 +111,23 @@ def main() -> None:
     )
 
     # Start overlay server if using JSON state
-    if str(args.overlay_path).lower().endswith(".json"):
+    if args.overlay_is_json:
         start_overlay_server(args.overlay_path, host=args.overlay_host, port=args.overlay_port)
         clear_state(args.overlay_path)
+        args.overlay_writer = OverlayWriter(args.overlay_path)
 
     if args.use_context:
         _start_clipboard_listener(args)
+    _start_speech_worker(args)
     _start_gamestate_watcher(args)
 
     if args.say:
         ctx = _maybe_context(args)
-        line = leviathan_reply(args.say, context=ctx)
-        logger.info("Leviathan will say: %s", line)
-        _speak_with_overlay(line, args, stream=args.stream)
+        line = _speak_stream_with_overlay(leviathan_reply_stream(args.say, context=ctx), args, stream=args.stream)
+        logger.info("Leviathan said: %s", line)
+        SPEECH_QUEUE.join()
+        if args.overlay_is_json:
+            args.overlay_writer.flush()
         return
 
     # Default to push-to-talk loop
@@ -112,7 +136,7 @@ def main() -> None:
 
 def _speak_line(line: str, stream: bool = False) -> None:
     try:
-        logger.info("Speaking line (stream=%s): %s", stream, line)
+        logger.debug("Speaking line (stream=%s): %s", stream, line)
         if stream:
             stream_speech(line)
         else:
@@ -122,12 +146,76 @@ def _speak_line(line: str, stream: bool = False) -> None:
         raise
 
 
+def _prefetch_line(line: str) -> None:
+    try:
+        prefetch_speech(line)
+    except Exception as exc:  # e.g. no API key; _speak_line reports it when the line plays
+        logger.debug("TTS prefetch skipped: %s", exc)
+
+
 def _speak_with_overlay(line: str, args, stream: bool = False) -> None:
-    with SPEECH_LOCK:
-        _maybe_render_overlay(line, args, mode="speak")
-        # Play audio synchronously so we can clear after playback finishes.
-        _speak_line(line, stream=stream)
-        _clear_overlay(args)
+    """
+    Queue a line for the speech worker; returns without waiting for playback.
+    """
+    SPEECH_QUEUE.put((line, line, stream, _speech_epoch()))
+
+
+def _speak_stream_with_overlay(sentences: Iterable[str], args, stream: bool = False) -> str:
+    """
+    Speak a reply while it is still being generated. Each sentence is queued for the
+    speech worker as soon as it arrives, so synthesis overlaps with LLM decoding and
+    the caller can go back to listening before playback ends.
+    Returns the full reply text.
+    """
+    spoken: list[str] = []
+    epoch = _speech_epoch()
+    for sentence in sentences:
+        if spoken:
+            # The worker is still busy with earlier sentences; synthesize this one meanwhile.
+            _prefetch_line(sentence)
+        spoken.append(sentence)
+        # Overlay shows the reply so far once this sentence starts playing.
+        SPEECH_QUEUE.put((sentence, " ".join(spoken), stream, epoch))
+    return " ".join(spoken)
+
+
+def _start_speech_worker(args) -> None:
+    thread = threading.Thread(target=_speech_loop, args=(args,), name="speech", daemon=True)
+    thread.start()
+
+
+def _speech_loop(args) -> None:
+    while True:
+        line, overlay_text, stream, epoch = SPEECH_QUEUE.get()
+        try:
+            if epoch < _speech_epoch():
+                # The user started talking after this was queued; drop the stale line.
+                logger.debug("Barge-in: skipping queued line: %s", line)
+                continue
+            with SPEECH_LOCK:
+                _maybe_render_overlay(overlay_text, args, mode="speak")
+                try:
+                    _speak_line(line, stream=stream)
+                except Exception:
+                    pass  # already logged by _speak_line; keep the worker alive
+                # Delayed clear; the next queued sentence cancels it.
+                _clear_overlay(args)
+        finally:
+            SPEECH_QUEUE.task_done()
+
+
+def _speech_epoch() -> int:
+    with _EPOCH_LOCK:
+        return _SPEECH_EPOCH
+
+
+def _barge_in() -> None:
+    """
+    Called when push-to-talk recording starts: lines queued before now are skipped.
+    """
+    global _SPEECH_EPOCH
+    with _EPOCH_LOCK:
+        _SPEECH_EPOCH += 1
 
 
 def run_listen_mode(args, settings) -> None:
@@ -140,10 +228,16 @@ def run_listen_mode(args, settings) -> None:
     logger.info("Push-to-talk mode. Hold Ctrl to record, release to transcribe. Ctrl+C to exit.")
     stt_model = settings.openai_stt_model or "whisper-1"
     local_model = settings.local_whisper_model or "base"
+    # Load the weights up front so the first push-to-talk turn doesn't pay for it.
+    whisper_model = None
+    try:
+        whisper_model = load_whisper_model(local_model)
+    except Exception as exc:
+        logger.warning("Local Whisper preload failed (%s); will retry on first transcription.", exc)
 
     try:
         while True:
-            audio = record_push_to_talk()
+            audio = record_push_to_talk(on_start=_barge_in)
             if not audio:
                 continue
             _render_thinking(args)
@@ -154,6 +248,7 @@ def run_listen_mode(args, settings) -> None:
                     openai_model=stt_model,
                     local_model=local_model,
                     prefer_local=True,  # always prefer local STT
+                    whisper_model=whisper_model,
                 )
             except Exception as exc:
                 logger.error("Transcription failed: %s", exc)
@@ -166,49 +261,31 @@ def run_listen_mode(args, settings) -> None:
                 _clear_overlay(args)
                 continue
 
-            logger.info("You said: %s", transcript)
             ctx = _maybe_context(args)
-            line = leviathan_reply(transcript, context=ctx)
-            logger.info("Leviathan will say: %s", line)
-            _speak_with_overlay(line, args, stream=args.stream)
+            line = _speak_stream_with_overlay(
+                leviathan_reply_stream(transcript, context=ctx), args, stream=args.stream
+            )
+            logger.info("You said: %s | Leviathan: %s", transcript, line)
     except KeyboardInterrupt:
         logger.info("Exiting listen mode.")
 
 def _maybe_render_overlay(text: str, args, mode: str | None = None) -> None:
-    if not getattr(args, "overlay_path", None):
+    if not args.overlay_is_json:
         return
-    try:
-        if str(args.overlay_path).lower().endswith(".json"):
-            write_state(
-                args.overlay_path,
-                mode=mode or args.overlay_mode,
-                text=text,
-                font_size=args.overlay_font_size,
-            )
-    except Exception as exc:
-        logger.error("Failed to render overlay: %s", exc)
+    args.overlay_writer.set(mode or args.overlay_mode, text=text, font_size=args.overlay_font_size)
 
 
 def _render_thinking(args) -> None:
-    if not getattr(args, "overlay_path", None):
+    if not args.overlay_is_json:
         return
-    try:
-        if str(args.overlay_path).lower().endswith(".json"):
-            write_state(args.overlay_path, mode="think", text="...", font_size=args.overlay_font_size)
-    except Exception as exc:
-        logger.error("Failed to render thinking overlay: %s", exc)
+    args.overlay_writer.set("think", text="...", font_size=args.overlay_font_size)
 
 
 def _clear_overlay(args, delay: float = 1.0) -> None:
-    if not getattr(args, "overlay_path", None):
+    if not args.overlay_is_json:
         return
-    if delay > 0:
-        time.sleep(delay)
-    try:
-        if str(args.overlay_path).lower().endswith(".json"):
-            clear_state(args.overlay_path)
-    except Exception as exc:
-        logger.error("Failed to clear overlay: %s", exc)
+    # Scheduled on the writer, so the speech path doesn't wait out the delay.
+    args.overlay_writer.clear(delay=delay)
 
 
 def _maybe_context(args) -> str | None:
@@ -233,6 +310,8 @@ def _maybe_context(args) -> str | None:
 def _start_clipboard_listener(args) -> None:
     hotkey = args.capture_clipboard_hotkey
     try:
+        import keyboard  # type: ignore
+
         keyboard.add_hotkey(hotkey, lambda: _capture_clipboard_to_context())
         logger.info("Clipboard capture hotkey active: %s", hotkey)
     except Exception as exc:
@@ -240,10 +319,16 @@ def _start_clipboard_listener(args) -> None:
 
 
 def _capture_clipboard_to_context() -> None:
+    global _LAST_CTX_HASH
     selection = _read_clipboard_text()
     title = _get_active_window_title()
+    ctx_hash = hash((title, selection))
+    if ctx_hash == _LAST_CTX_HASH:
+        logger.debug("Clipboard context unchanged; skipping write.")
+        return
     try:
         write_context("overlay/context.json", url=title, selection=selection)
+        _LAST_CTX_HASH = ctx_hash
         logger.info("Captured context from clipboard (title=%s, chars=%s)", title, len(selection))
     except Exception as exc:
         logger.error("Failed to write clipboard context: %s", exc)
@@ -251,6 +336,11 @@ def _capture_clipboard_to_context() -> None:
 
 def _read_clipboard_text() -> str:
     try:
+        if sys.platform == "win32":
+            return _read_clipboard_win32()
+        # Non-Windows fallback: Tk is heavy, so only load it when actually needed.
+        import tkinter as tk
+
         root = tk.Tk()
         root.withdraw()
         text = root.clipboard_get()
@@ -260,6 +350,38 @@ def _read_clipboard_text() -> str:
         return ""
 
 
+def _read_clipboard_win32() -> str:
+    """
+    Read Unicode clipboard text through user32/kernel32 without creating a window.
+    """
+    from ctypes import wintypes
+
+    user32 = ctypes.WinDLL("user32")
+    kernel32 = ctypes.WinDLL("kernel32")
+    user32.OpenClipboard.argtypes = [wintypes.HWND]
+    user32.GetClipboardData.argtypes = [wintypes.UINT]
+    user32.GetClipboardData.restype = wintypes.HANDLE
+    kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalLock.restype = wintypes.LPVOID
+    kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
+
+    if not user32.OpenClipboard(None):
+        return ""
+    try:
+        handle = user32.GetClipboardData(CF_UNICODETEXT)
+        if not handle:
+            return ""
+        ptr = kernel32.GlobalLock(handle)
+        if not ptr:
+            return ""
+        try:
+            return ctypes.wstring_at(ptr)
+        finally:
+            kernel32.GlobalUnlock(handle)
+    finally:
+        user32.CloseClipboard()
+
+
 def _get_active_window_title() -> str:
     try:
         hwnd = ctypes.windll.user32.GetForegroundWindow()
@@ -272,62 +394,116 @@ def _get_active_window_title() -> str:
 
 
 def _start_gamestate_watcher(args) -> None:
+    announcer = threading.Thread(target=_announce_loop, args=(args,), name="announcer", daemon=True)
+    announcer.start()
     thread = threading.Thread(target=_gamestate_loop, args=(args,), daemon=True)
     thread.start()
     logger.info("Gamestate watcher started (overlay/gamestate.json)")
 
 
 def _gamestate_loop(args) -> None:
-    # Seed announced set from existing log to avoid replaying old events.
-    announced_ids = set()
-    try:
-        for evt in read_gamestate_log("overlay/gamestate.log"):
-            evt_id = evt.get("event_id") or evt.get("event")
-            if evt_id:
-                announced_ids.add(evt_id)
-    except Exception:
-        pass
+    # Start tailing at the current end of the log so old events are never replayed.
+    tail = GamestateLogTail(GAMESTATE_LOG_PATH)
+    announced_ids: OrderedDict[str, None] = OrderedDict()
+    notifier = FileChangeNotifier(GAMESTATE_LOG_PATH)
+    seen = notifier.version
+    last_error_log = 0.0
+    suppressed_errors = 0
     while True:
         try:
-            new_events = []
-            for evt in read_gamestate_log("overlay/gamestate.log"):
-                evt_id = evt.get("event_id") or evt.get("event")
-                if evt_id and evt_id not in announced_ids:
-                    announced_ids.add(evt_id)
-                    new_events.append(evt)
-
+            new_events = _collect_new_events(tail, announced_ids)
             if new_events:
-                # Preserve arrival order; if multiple, announce in the order they were logged.
-                new_events = list(new_events)
-                winner_event = next((e for e in new_events if e.get("winner")), None)
-                if winner_event:
-                    w = winner_event.get("winner", {}) or {}
-                    wname = w.get("name") or winner_event.get("event", "Unknown victor")
-                    reason = w.get("reason") or ""
-                    announcement = leviathan_reply(
-                        f"Declare victory: {wname} wins. Reason: {reason}. Include the winner name verbatim and clearly."
-                    )
-                else:
-                    if len(new_events) == 1:
-                        event = new_events[0].get("event")
-                        announcement = leviathan_reply(
-                            f"Announce clearly the elimination: {event}. Include the team name verbatim."
-                        )
-                    else:
-                        names = [e.get("event", "") for e in new_events if e.get("event")]
-                        joined = "; ".join(names)
-                        announcement = leviathan_reply(
-                            f"Announce clearly these eliminations together: {joined}. Include each team name verbatim."
-                        )
-                logger.info("Announcing game events batch: %s", [e.get('event') for e in new_events])
-                try:
-                    _speak_with_overlay(announcement, args, stream=args.stream)
-                    _clear_overlay(args)
-                except Exception as exc:
-                    logger.error("Failed to speak game event batch: %s", exc)
+                # Drain: keep collecting while events are still arriving so a burst
+                # turns into a single announcement instead of one per event.
+                deadline = time.monotonic() + GAMESTATE_MAX_DRAIN
+                while time.monotonic() < deadline:
+                    time.sleep(GAMESTATE_QUIET_PERIOD)
+                    more = _collect_new_events(tail, announced_ids)
+                    if not more:
+                        break
+                    new_events.extend(more)
+                _announce_game_events(new_events)
+        except Exception as exc:
+            now = time.monotonic()
+            if now - last_error_log >= WATCHER_ERROR_LOG_INTERVAL:
+                logger.debug("Gamestate watcher error: %s (%s similar suppressed)", exc, suppressed_errors)
+                last_error_log = now
+                suppressed_errors = 0
+            else:
+                suppressed_errors += 1
+        # Sleep until the log changes instead of rescanning on a fixed interval.
+        seen = notifier.wait(seen, timeout=GAMESTATE_IDLE_RECHECK)
+
+
+def _collect_new_events(tail: GamestateLogTail, announced_ids: OrderedDict[str, None]) -> list[dict]:
+    new_events = []
+    for evt in tail.read_new():
+        evt_id = evt.get("event_id") or evt.get("event")
+        if evt_id and evt_id not in announced_ids:
+            announced_ids[evt_id] = None
+            if len(announced_ids) > ANNOUNCED_IDS_MAX:
+                announced_ids.popitem(last=False)
+            new_events.append(evt)
+    return new_events
+
+
+def _announce_game_events(new_events: list[dict]) -> None:
+    """
+    Queue a drained batch as at most one elimination prompt and one victory prompt.
+    """
+    winner_events = [e for e in new_events if e.get("winner")]
+    names = [e.get("event", "") for e in new_events if e.get("event") and not e.get("winner")]
+    prompts = []
+    if len(names) == 1:
+        prompts.append(f"Announce clearly the elimination: {names[0]}. Include the team name verbatim.")
+    elif names:
+        joined = "; ".join(names)
+        prompts.append(f"Announce clearly these eliminations together: {joined}. Include each team name verbatim.")
+    if winner_events:
+        # Only the latest winner matters if several arrived in one burst.
+        winner_event = winner_events[-1]
+        w = winner_event.get("winner", {}) or {}
+        wname = w.get("name") or winner_event.get("event", "Unknown victor")
+        reason = w.get("reason") or ""
+        prompts.append(
+            f"Declare victory: {wname} wins. Reason: {reason}. Include the winner name verbatim and clearly."
+        )
+
+    logger.info("Announcing game events batch: %s", [e.get("event") for e in new_events])
+    for prompt in prompts:
+        _queue_announcement(prompt)
+
+
+def _queue_announcement(prompt: str) -> None:
+    """
+    Hand a prompt to the announcer without blocking; when full, the oldest prompt is dropped.
+    """
+    while True:
+        try:
+            ANNOUNCE_QUEUE.put_nowait(prompt)
+            return
+        except queue.Full:
+            try:
+                dropped = ANNOUNCE_QUEUE.get_nowait()
+                ANNOUNCE_QUEUE.task_done()
+                logger.warning("Announcement backlog full; dropping: %s", dropped)
+            except queue.Empty:
+                pass
+
+
+def _announce_loop(args) -> None:
+    # Runs the LLM call off the watcher thread so log reads never wait on a reply.
+    while True:
+        prompt = ANNOUNCE_QUEUE.get()
+        try:
+            # Announcements differing only in a name embed almost identically; a cached
+            # reply could name the wrong team, so skip the reply caches here.
+            announcement = leviathan_reply(prompt, cache_prompt=False)
+            _speak_with_overlay(announcement, args, stream=args.stream)
         except Exception as exc:
-            logger.debug("Gamestate watcher error: %s", exc)
-        time.sleep(1.0)
+            logger.error("Failed to announce game events: %s", exc)
+        finally:
+            ANNOUNCE_QUEUE.task_done()
 
 
 if __name__ == "__main__":
@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import enum
 import logging
+import re
 from typing import Any, Dict, Optional
 
 logger = logging.getLogger(__name__)
@@ -18,18 +19,22 @@ class Intent(enum.Enum):
     EXPLAIN_LOGIC = "explain_logic"
 
 
+# One alternation scanned in C; group order doubles as keyword priority.
+_INTENT_RE = re.compile(r"(review)|(event)|(explain|logic)", re.IGNORECASE)
+_INTENT_BY_GROUP = (Intent.REVIEW_CODE, Intent.GENERATE_EVENT, Intent.EXPLAIN_LOGIC)
+
+
 def parse_intent(command_text: str) -> Intent:
     """
     Very naive parser to be replaced in Phase 4.
+    Keyword priority: review > event > explain/logic, regardless of position.
     """
-    text = command_text.lower()
-    if "review" in text:
-        return Intent.REVIEW_CODE
-    if "event" in text:
-        return Intent.GENERATE_EVENT
-    if "explain" in text or "logic" in text:
-        return Intent.EXPLAIN_LOGIC
-    return Intent.UNKNOWN
+    best = len(_INTENT_BY_GROUP)
+    for match in _INTENT_RE.finditer(command_text):
+        best = min(best, match.lastindex - 1)
+        if best == 0:
+            break
+    return _INTENT_BY_GROUP[best] if best < len(_INTENT_BY_GROUP) else Intent.UNKNOWN
 
 
 def handle_command(intent: Intent, args: Optional[Dict[str, Any]] = None) -> str:
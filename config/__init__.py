@@ -1,10 +1,16 @@
 from .env import get_env, load_env
+from .jsonio import json_dumps, json_loads, json_loads_many, write_bytes_atomic, write_json_atomic
 from .logging import configure_logging
 from .settings import Settings, load_settings
 
 __all__ = [
     "get_env",
     "load_env",
+    "json_dumps",
+    "json_loads",
+    "json_loads_many",
+    "write_bytes_atomic",
+    "write_json_atomic",
     "configure_logging",
     "Settings",
     "load_settings",
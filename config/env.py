@@ -6,26 +6,40 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
+
+# Keys merged from each resolved .env path, so repeat loads can be skipped.
+_ENV_LOADED: Dict[Path, tuple[str, ...]] = {}
 
 
 def load_env(dotenv_path: str | Path = ".env") -> None:
     """
     Parse a .env file and merge values into os.environ if not already set.
     Lines starting with '#' or blank lines are ignored.
+    Files already merged are skipped unless their keys were removed from os.environ.
     """
     path = Path(dotenv_path)
+    resolved = path.resolve()
+    loaded_keys = _ENV_LOADED.get(resolved)
+    if loaded_keys is not None and all(key in os.environ for key in loaded_keys):
+        return
     if not path.exists():
         return
 
-    for raw_line in path.read_text().splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        key = key.strip()
-        value = value.strip().strip("\"'")
-        os.environ.setdefault(key, value)
+    keys = []
+    with path.open("r", encoding="utf-8") as fh:
+        for raw_line in fh:
+            line = raw_line.strip()
+            if not line or line.startswith("#"):
+                continue
+            key, sep, value = line.partition("=")
+            if not sep:
+                continue
+            key = key.strip()
+            value = value.strip().strip("\"'")
+            os.environ.setdefault(key, value)
+            keys.append(key)
+    _ENV_LOADED[resolved] = tuple(keys)
 
 
 def get_env(key: str, default: Optional[str] = None, required: bool = False) -> Optional[str]:
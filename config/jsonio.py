@@ -0,0 +1,83 @@
+"""
+JSON helpers that use orjson when installed and fall back to the stdlib json module.
+Both work in UTF-8 bytes so callers skip the str encode/decode round trip.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, List
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
+
+
+def json_dumps(obj: Any) -> bytes:
+    """
+    Serialize to compact UTF-8 JSON bytes (non-ASCII characters are kept as-is).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(data: bytes | bytearray | memoryview | str) -> Any:
+    """
+    Parse JSON from UTF-8 bytes or str.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def json_loads_many(chunks: List[bytes]) -> List[Any]:
+    """
+    Parse a list of JSON documents; raises ValueError if any of them is invalid.
+    The stdlib parser pays a fixed cost per call, so it parses one joined array instead;
+    orjson is already cheap per call and is faster without the join.
+    """
+    if orjson is not None:
+        return [orjson.loads(chunk) for chunk in chunks]
+    parsed = json.loads(b"[" + b",".join(chunks) + b"]")
+    if len(parsed) != len(chunks):
+        # A chunk like `1,2` parses as two elements once joined; let the caller go line by line.
+        raise ValueError("JSON documents did not map one-to-one")
+    return parsed
+
+
+def write_json_atomic(path: str | Path, obj: Any) -> Path:
+    """
+    Write obj as JSON so readers see either the old file or the new one, never a partial write.
+    """
+    return write_bytes_atomic(path, json_dumps(obj))
+
+
+def write_bytes_atomic(path: str | Path, data: bytes) -> Path:
+    """
+    Replace the file's contents with data atomically (for already-encoded JSON).
+    Writes a sibling temp file and os.replace()s it over the target (no fsync; durability
+    across power loss is not needed for these small state files).
+    """
+    out_path = Path(path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(f"{out_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    for attempt in range(5):
+        try:
+            os.replace(tmp, out_path)
+            return out_path
+        except PermissionError:
+            # Windows refuses to replace a file another process has open; it is only ever briefly.
+            time.sleep(0.01 * (attempt + 1))
+    try:
+        out_path.write_bytes(tmp.read_bytes())
+    finally:
+        tmp.unlink(missing_ok=True)
+    return out_path
@@ -3,20 +3,45 @@ Basic logging configuration for Leviathan.
 """
 from __future__ import annotations
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+from typing import Optional
 
 
 DEFAULT_LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+
 
 def configure_logging(level: str | None = None) -> None:
     """
     Configure root logging once with a consistent format.
+    Records go through a queue to a listener thread, so handler I/O stays off hot paths.
     """
+    global _LISTENER
     log_level = (level or os.getenv("LOG_LEVEL") or DEFAULT_LOG_LEVEL).upper()
+    if _LISTENER is not None:
+        _LISTENER.stop()
+    else:
+        atexit.register(_stop_listener)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
     logging.basicConfig(
         level=getattr(logging, log_level, logging.INFO),
         format=LOG_FORMAT,
+        handlers=[logging.handlers.QueueHandler(log_queue)],
+        force=True,
     )
+    # Records arrive already formatted by the QueueHandler; the listener only writes them.
+    _LISTENER = logging.handlers.QueueListener(log_queue, logging.StreamHandler(), respect_handler_level=True)
+    _LISTENER.start()
+
+
+def _stop_listener() -> None:
+    # Flushes any queued records before the interpreter exits.
+    if _LISTENER is not None:
+        _LISTENER.stop()
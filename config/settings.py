@@ -4,6 +4,7 @@ Loads environment variables from .env and exposes a simple Settings object.
 """
 from __future__ import annotations
 
+import functools
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -27,9 +28,18 @@ class Settings:
     ollama_model: str | None
     project_root: Path
     tts_playback_volume: float | None
+    tts_cache_dir: str | None
+    tts_cache_max_mb: float | None
+    semantic_cache_model: str | None
+    semantic_cache_threshold: float | None
 
 
+@functools.lru_cache(maxsize=4)
 def load_settings(dotenv_path: str | Path = ".env") -> Settings:
+    """
+    Load settings once per dotenv path; later calls return the same cached instance.
+    Use load_settings.cache_clear() to pick up environment changes.
+    """
     load_env(dotenv_path)
     project_root = Path(get_env("PROJECT_ROOT", default=Path.cwd().as_posix()) or Path.cwd())
     return Settings(
@@ -50,6 +60,10 @@ def load_settings(dotenv_path: str | Path = ".env") -> Settings:
         ollama_model=get_env("OLLAMA_MODEL"),
         project_root=Path(project_root),
         tts_playback_volume=_optional_float(get_env("TTS_PLAYBACK_VOLUME")),
+        tts_cache_dir=get_env("TTS_CACHE_DIR"),
+        tts_cache_max_mb=_optional_float(get_env("TTS_CACHE_MAX_MB")),
+        semantic_cache_model=get_env("SEMANTIC_CACHE_MODEL"),
+        semantic_cache_threshold=_optional_float(get_env("SEMANTIC_CACHE_THRESHOLD")),
     )
 
 
@@ -4,19 +4,78 @@ Defaults to a deterministic persona quip when no backend is available.
 """
 from __future__ import annotations
 
-import json
+import asyncio
+import functools
+import hashlib
 import logging
 import random
-import urllib.error
-import urllib.request
-from typing import Optional
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple
 
-from config import load_settings
+from config import json_dumps, json_loads, load_settings
+from net import ConnectionPool, HTTPStatusError
+
+from .semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_OPENAI_MODEL = "gpt-4o-mini"
 DEFAULT_OLLAMA_MODEL = "llama3:8b"
+OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_GENERATE_PATH = "/api/generate"
+OLLAMA_EMBED_PATH = "/api/embeddings"
+OPENAI_BASE_URL = "https://api.openai.com"
+OPENAI_CHAT_PATH = "/v1/chat/completions"
+# After a backend is unreachable (or rejects our key), go straight to persona for this long.
+BACKEND_RETRY_AFTER = 30.0
+# Upper bound on replies in flight at once from reply_many(); matches the pool size.
+MAX_PARALLEL_REPLIES = 4
+
+# Exact-match reply cache: identical prompts skip the LLM round trip entirely.
+RESPONSE_CACHE_MAX = 512
+RESPONSE_CACHE_TTL = 3600.0
+# Embedding calls are local and small; don't let a stuck one hold up the reply.
+EMBED_TIMEOUT = 10.0
+
+# One keep-alive pool per endpoint so each reply skips the TCP (and TLS) handshake.
+_OLLAMA_POOL = ConnectionPool(OLLAMA_BASE_URL, maxsize=4)
+# OpenAI gets a short connect timeout and retries on throttling/5xx so one hiccup doesn't drop to persona.
+_OPENAI_POOL = ConnectionPool(
+    OPENAI_BASE_URL,
+    maxsize=4,
+    timeout=60.0,
+    connect_timeout=3.0,
+    retries=3,
+    backoff_factor=0.2,
+    status_forcelist=(429, 500, 502, 503, 504),
+)
+
+# A sentence is complete once its terminator is followed by whitespace.
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+_PERSONA_OPENERS = (
+    "We are Code Leviathan.",
+    "The abyss answers (with a grin).",
+    "Leviathan stirs—keep up.",
+    "Your code tides shift; so does our mood.",
+)
+_PERSONA_TONES = (
+    "Brief, with bite.",
+    "Pointed, a smirk implied.",
+    "Dry humor only; no flattery.",
+)
+# Every opener/tone pairing, so a persona reply is one random draw and one format().
+_PERSONA_TEMPLATES = tuple(f"{o} {{text}}{{ctx}} {t}" for o in _PERSONA_OPENERS for t in _PERSONA_TONES)
+
+# key -> (stored_at, reply); oldest entries first.
+_RESPONSE_CACHE: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+# Paraphrase cache, only consulted when SEMANTIC_CACHE_MODEL is set.
+_SEMANTIC_CACHE = SemanticCache()
 
 
 class LeviathanBrain:
@@ -25,60 +84,210 @@ class LeviathanBrain:
         self.provider = (self.settings.llm_provider or "local").lower()
         self.openai_model = self.settings.openai_llm_model or DEFAULT_OPENAI_MODEL
         self.ollama_model = self.settings.ollama_model or DEFAULT_OLLAMA_MODEL
+        # monotonic() deadlines before which a failed backend is not retried.
+        self._ollama_fail_until = 0.0
+        self._openai_fail_until = 0.0
+        # Static request fields are serialized once; each call only encodes and splices the prompt.
+        ollama_base = {"model": self.ollama_model, "system": SYSTEM_PROMPT}
+        self._ollama_body_head = _json_prefix({**ollama_base, "stream": False}, "prompt")
+        self._ollama_stream_body_head = _json_prefix({**ollama_base, "stream": True}, "prompt")
+        self._ollama_headers = {"Content-Type": "application/json"}
+        openai_base = {"model": self.openai_model, "temperature": 0.6, "max_tokens": 120}
+        self._openai_body_head = (
+            _json_prefix(openai_base, "messages")
+            + b"["
+            + json_dumps({"role": "system", "content": SYSTEM_PROMPT})
+            + b","
+        )
+        self._openai_headers = {
+            "Authorization": f"Bearer {self.settings.openai_api_key}",
+            "Content-Type": "application/json",
+        }
+        # Opt-in: an Ollama embedding model (e.g. nomic-embed-text) enables the paraphrase cache.
+        self.semantic_cache_model = self.settings.semantic_cache_model
+        # Per brain; the shared cache's own threshold applies when unset.
+        self.semantic_cache_threshold = self.settings.semantic_cache_threshold
 
-    def reply(self, user_request: str, context: Optional[str] = None) -> str:
+    def reply(self, user_request: str, context: Optional[str] = None, cache_prompt: bool = True) -> str:
+        """
+        Reply to one request. Pass cache_prompt=False to bypass the reply caches
+        (neither read nor stored), e.g. for sensitive prompts.
+        """
         text = user_request.strip() or "Speak, mortal."
-        if self.provider in ("ollama", "local"):
+        key, vector, cached = self._lookup_cache(text, context) if cache_prompt else ("", None, None)
+        if cached is not None:
+            return cached
+        # Only non-empty backend replies are cached; the persona fallback is cheap and should vary.
+        if self.provider in ("ollama", "local") and self._ollama_available():
             try:
-                return self._ollama_chat(text, context=context)
+                answer = self._ollama_chat(text, context=context)
+                if answer:
+                    return self._store_cache(key, vector, answer)
             except Exception as exc:  # pragma: no cover - runtime/availability dependent
+                self._note_ollama_failure(exc)
                 logger.warning("Ollama backend failed (%s); falling back to persona.", exc)
-        if self.provider == "openai":
+        if self.provider == "openai" and self._openai_available():
             try:
-                return self._openai_chat(text, context=context)
+                answer = self._openai_chat(text, context=context)
+                if answer:
+                    return self._store_cache(key, vector, answer)
             except Exception as exc:  # pragma: no cover
+                self._note_openai_failure(exc)
                 logger.warning("OpenAI backend failed (%s); falling back to persona.", exc)
         return self._persona_only(text, context=context)
 
+    def reply_many(self, prompts: Sequence[str], context: Optional[str] = None) -> List[str]:
+        """
+        Reply to several prompts concurrently so their round trips overlap.
+        Results keep the input order. Ollama only runs them in parallel when
+        OLLAMA_NUM_PARALLEL allows it; otherwise it queues them server-side.
+        """
+        if len(prompts) <= 1:
+            return [self.reply(p, context=context) for p in prompts]
+        with ThreadPoolExecutor(max_workers=min(len(prompts), MAX_PARALLEL_REPLIES)) as pool:
+            return list(pool.map(lambda p: self.reply(p, context=context), prompts))
+
+    async def areply(self, user_request: str, context: Optional[str] = None) -> str:
+        """
+        Async wrapper around reply() for callers already running an event loop.
+        """
+        return await asyncio.to_thread(self.reply, user_request, context)
+
+    def reply_stream(
+        self, user_request: str, context: Optional[str] = None, cache_prompt: bool = True
+    ) -> Iterator[str]:
+        """
+        Yield the reply sentence by sentence as the backend generates it.
+        Only Ollama streams; other backends yield their full reply once.
+        """
+        text = user_request.strip() or "Speak, mortal."
+        if self.provider not in ("ollama", "local") or not self._ollama_available():
+            yield self.reply(text, context=context, cache_prompt=cache_prompt)
+            return
+        key, vector, cached = self._lookup_cache(text, context) if cache_prompt else ("", None, None)
+        if cached is not None:
+            yield cached
+            return
+
+        started = False
+        sentences: List[str] = []
+        try:
+            for sentence in self._ollama_stream(text, context=context):
+                started = True
+                sentences.append(sentence)
+                yield sentence
+            if sentences and cache_prompt:
+                self._store_cache(key, vector, " ".join(sentences))
+        except Exception as exc:  # pragma: no cover - runtime/availability dependent
+            if started:
+                logger.warning("Ollama stream interrupted (%s); reply truncated.", exc)
+                return
+            self._note_ollama_failure(exc)
+            logger.warning("Ollama backend failed (%s); falling back to persona.", exc)
+        if not started:
+            yield self._persona_only(text, context=context)
+
+    def _cache_key(self, text: str, context: Optional[str]) -> str:
+        # Model and system prompt are part of the key so config changes never serve stale replies.
+        # The OpenAI temperature is fixed, so one sample per prompt is treated as the answer.
+        raw = json_dumps([self._cache_scope(), SYSTEM_PROMPT, text, context or ""])
+        return hashlib.sha256(raw).hexdigest()
+
+    def _lookup_cache(self, text: str, context: Optional[str]) -> Tuple[str, Optional[List[float]], Optional[str]]:
+        """
+        Check the exact cache, then the semantic one. Returns (key, embedding, reply);
+        the key and embedding are reused to store the reply on a miss.
+        """
+        key = self._cache_key(text, context)
+        cached = _cache_get(key)
+        if cached is not None or not self.semantic_cache_model or not self._ollama_available():
+            return key, None, cached
+        vector = self._embed(build_prompt(text, context))
+        if vector is not None:
+            cached = _SEMANTIC_CACHE.get(vector, self._cache_scope(), threshold=self.semantic_cache_threshold)
+            if cached is not None:
+                _cache_put(key, cached)
+        return key, vector, cached
+
+    def _store_cache(self, key: str, vector: Optional[List[float]], reply: str) -> str:
+        if key:
+            _cache_put(key, reply)
+        if vector is not None:
+            _SEMANTIC_CACHE.put(vector, self._cache_scope(), reply)
+        return reply
+
+    def _cache_scope(self) -> str:
+        model = self.openai_model if self.provider == "openai" else self.ollama_model
+        return f"{self.provider}:{model}"
+
+    def _embed(self, prompt: str) -> Optional[List[float]]:
+        payload = {"model": self.semantic_cache_model, "prompt": prompt}
+        try:
+            resp_data = _OLLAMA_POOL.post(
+                OLLAMA_EMBED_PATH, body=json_dumps(payload), headers=self._ollama_headers, timeout=EMBED_TIMEOUT
+            )
+            return json_loads(resp_data).get("embedding") or None
+        except Exception as exc:  # pragma: no cover - runtime/availability dependent
+            # Embeddings come from Ollama too: a dead server is skipped until the retry window ends.
+            self._note_ollama_failure(exc)
+            logger.debug("Embedding failed (%s); skipping semantic cache.", exc)
+            return None
+
+    def _ollama_available(self) -> bool:
+        if time.monotonic() < self._ollama_fail_until:
+            logger.debug("Ollama marked unavailable; using persona.")
+            return False
+        return True
+
+    def _openai_available(self) -> bool:
+        if time.monotonic() < self._openai_fail_until:
+            logger.debug("OpenAI marked unavailable; using persona.")
+            return False
+        return True
+
+    def _note_ollama_failure(self, exc: BaseException) -> None:
+        # Connection refused/reset/timeout: the server isn't there, so stop paying for it.
+        if isinstance(exc, OSError):
+            self._ollama_fail_until = time.monotonic() + BACKEND_RETRY_AFTER
+
+    def _note_openai_failure(self, exc: BaseException) -> None:
+        cause = exc.__cause__ if isinstance(exc.__cause__, HTTPStatusError) else exc
+        if isinstance(exc, OSError) or (isinstance(cause, HTTPStatusError) and cause.status in (401, 403)):
+            self._openai_fail_until = time.monotonic() + BACKEND_RETRY_AFTER
+
     def _persona_only(self, text: str, context: Optional[str]) -> str:
-        openers = [
-            "We are Code Leviathan.",
-            "The abyss answers (with a grin).",
-            "Leviathan stirs—keep up.",
-            "Your code tides shift; so does our mood.",
-        ]
-        tone = [
-            "Brief, with bite.",
-            "Pointed, a smirk implied.",
-            "Dry humor only; no flattery.",
-        ]
         ctx = f" Context: {context}." if context else ""
-        return f"{random.choice(openers)} {text}{ctx} {random.choice(tone)}"
+        template = _PERSONA_TEMPLATES[random.randrange(len(_PERSONA_TEMPLATES))]
+        return template.format(text=text, ctx=ctx)
 
     def _ollama_chat(self, text: str, context: Optional[str]) -> str:
         """
         Call a local Ollama server (http://localhost:11434) if available.
         """
-        import urllib.parse
+        data = self._ollama_body_head + json_dumps(build_prompt(text, context)) + b"}"
+        resp_data = _OLLAMA_POOL.post(OLLAMA_GENERATE_PATH, body=data, headers=self._ollama_headers, timeout=120)
+        parsed = json_loads(resp_data)
+        return parsed.get("response", "").strip()
 
-        prompt = build_prompt(text, context)
-        payload = {
-            "model": self.ollama_model,
-            "prompt": prompt,
-            "system": SYSTEM_PROMPT,
-            "stream": False,
-        }
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            "http://localhost:11434/api/generate",
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=120) as resp:
-            resp_data = resp.read()
-            parsed = json.loads(resp_data.decode("utf-8"))
-            return parsed.get("response", "").strip() or self._persona_only(text, context)
+    def _ollama_stream(self, text: str, context: Optional[str]) -> Iterator[str]:
+        """
+        Stream from Ollama and yield each sentence as soon as it is complete.
+        """
+        data = self._ollama_stream_body_head + json_dumps(build_prompt(text, context)) + b"}"
+        buffer = ""
+        with _OLLAMA_POOL.request(
+            "POST", OLLAMA_GENERATE_PATH, body=data, headers=self._ollama_headers, timeout=120
+        ) as resp:
+            # Read to EOF (not just the "done" line) so the connection can be reused.
+            for raw in resp:
+                if not raw.strip():
+                    continue
+                chunk = json_loads(raw)
+                buffer += chunk.get("response", "")
+                sentences, buffer = _split_sentences(buffer)
+                yield from sentences
+        if buffer.strip():
+            yield buffer.strip()
 
     def _openai_chat(self, text: str, context: Optional[str]) -> str:
         """
@@ -87,38 +296,54 @@ class LeviathanBrain:
         if not self.settings.openai_api_key:
             raise RuntimeError("OPENAI_API_KEY is required for OpenAI backend.")
 
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": build_prompt(text, context)},
-        ]
-        payload = {
-            "model": self.openai_model,
-            "messages": messages,
-            "temperature": 0.6,
-            "max_tokens": 120,
-        }
-        data = json.dumps(payload).encode("utf-8")
-        headers = {
-            "Authorization": f"Bearer {self.settings.openai_api_key}",
-            "Content-Type": "application/json",
-        }
-        req = urllib.request.Request(
-            "https://api.openai.com/v1/chat/completions", data=data, headers=headers, method="POST"
-        )
+        user_message = {"role": "user", "content": build_prompt(text, context)}
+        data = self._openai_body_head + json_dumps(user_message) + b"]}"
         try:
-            with urllib.request.urlopen(req, timeout=120) as resp:
-                resp_data = resp.read()
-                parsed = json.loads(resp_data.decode("utf-8"))
-                choice = parsed.get("choices", [{}])[0]
-                content = choice.get("message", {}).get("content", "") if isinstance(choice, dict) else ""
-                return content.strip() or self._persona_only(text, context)
-        except urllib.error.HTTPError as err:
-            body = ""
-            try:
-                body = err.read().decode("utf-8", errors="replace")
-            except Exception:
-                body = "<unreadable>"
-            raise RuntimeError(f"OpenAI chat failed ({err.code}): {body}") from err
+            resp_data = _OPENAI_POOL.post(OPENAI_CHAT_PATH, body=data, headers=self._openai_headers)
+        except HTTPStatusError as err:
+            raise RuntimeError(f"OpenAI chat failed ({err.status}): {err.text()}") from err
+        parsed = json_loads(resp_data)
+        choice = parsed.get("choices", [{}])[0]
+        content = choice.get("message", {}).get("content", "") if isinstance(choice, dict) else ""
+        return content.strip()
+
+
+def _cache_get(key: str) -> Optional[str]:
+    with _RESPONSE_CACHE_LOCK:
+        entry = _RESPONSE_CACHE.get(key)
+        if entry is None:
+            return None
+        stored_at, reply = entry
+        if time.monotonic() - stored_at >= RESPONSE_CACHE_TTL:
+            del _RESPONSE_CACHE[key]
+            return None
+        _RESPONSE_CACHE.move_to_end(key)
+        return reply
+
+
+def _cache_put(key: str, reply: str) -> str:
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = (time.monotonic(), reply)
+        _RESPONSE_CACHE.move_to_end(key)
+        while len(_RESPONSE_CACHE) > RESPONSE_CACHE_MAX:
+            _RESPONSE_CACHE.popitem(last=False)
+    return reply
+
+
+def _json_prefix(static_fields: dict, next_key: str) -> bytes:
+    """
+    Serialize a JSON object without its closing brace, ready for one more key's value.
+    """
+    return json_dumps(static_fields)[:-1] + b"," + json_dumps(next_key) + b":"
+
+
+def _split_sentences(buffer: str) -> Tuple[List[str], str]:
+    """
+    Split off complete sentences; return them with the unfinished remainder.
+    """
+    parts = _SENTENCE_BREAK.split(buffer)
+    remainder = parts.pop()
+    return [p.strip() for p in parts if p.strip()], remainder
 
 
 def build_prompt(user_request: str, context: Optional[str]) -> str:
@@ -137,11 +362,25 @@ SYSTEM_PROMPT = """You are **Leviathan**, a high-energy human co-host (the drago
 - Deliver one cohesive response; avoid double-takes or “but seriously” follow-ups."""
 
 
-_brain = LeviathanBrain()
+@functools.cache
+def _get_brain() -> LeviathanBrain:
+    # Built on first use so importing this module doesn't load settings from disk.
+    return LeviathanBrain()
 
 
-def leviathan_reply(user_request: str, context: Optional[str] = None) -> str:
+def leviathan_reply(user_request: str, context: Optional[str] = None, cache_prompt: bool = True) -> str:
     """
     Public entrypoint: generate a Leviathan-styled reply using configured backend.
+    Pass cache_prompt=False to bypass the reply caches.
+    """
+    return _get_brain().reply(user_request, context=context, cache_prompt=cache_prompt)
+
+
+def leviathan_reply_stream(
+    user_request: str, context: Optional[str] = None, cache_prompt: bool = True
+) -> Iterator[str]:
+    """
+    Streaming entrypoint: yield the reply sentence by sentence as it is generated.
+    Pass cache_prompt=False to bypass the reply caches.
     """
-    return _brain.reply(user_request, context=context)
+    return _get_brain().reply_stream(user_request, context=context, cache_prompt=cache_prompt)
@@ -0,0 +1,83 @@
+"""
+Near-duplicate reply cache: serves a stored reply when a new prompt's embedding
+is close enough (cosine similarity) to one that was already answered.
+"""
+from __future__ import annotations
+
+import math
+import operator
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL = 3600.0
+
+try:
+    from math import sumprod as _dot  # Python 3.12+
+except ImportError:  # pragma: no cover - older interpreters
+
+    def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+        return sum(map(operator.mul, a, b))
+
+
+class SemanticCache:
+    """
+    In-memory store of (unit vector, reply) pairs scoped by backend/model.
+    Lookups are a linear dot-product scan, which is cheap next to an LLM call
+    at this size.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # (stored_at, scope, unit vector, reply); oldest first.
+        self._entries: List[Tuple[float, str, Tuple[float, ...], str]] = []
+        self._lock = threading.Lock()
+
+    def get(self, vector: Sequence[float], scope: str, threshold: Optional[float] = None) -> Optional[str]:
+        """
+        Return the reply for the most similar stored prompt above the threshold
+        (self.threshold unless one is passed).
+        """
+        unit = _normalize(vector)
+        if unit is None:
+            return None
+        cutoff = time.monotonic() - self.ttl
+        best_score, best_reply = self.threshold if threshold is None else threshold, None
+        with self._lock:
+            self._entries = [e for e in self._entries if e[0] > cutoff]
+            for _, entry_scope, entry_vec, reply in self._entries:
+                if entry_scope != scope or len(entry_vec) != len(unit):
+                    continue
+                score = _dot(unit, entry_vec)
+                if score >= best_score:
+                    best_score, best_reply = score, reply
+        return best_reply
+
+    def put(self, vector: Sequence[float], scope: str, reply: str) -> None:
+        unit = _normalize(vector)
+        if unit is None:
+            return
+        with self._lock:
+            self._entries.append((time.monotonic(), scope, unit, reply))
+            if len(self._entries) > self.max_entries:
+                del self._entries[: len(self._entries) - self.max_entries]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = []
+
+
+def _normalize(vector: Sequence[float]) -> Optional[Tuple[float, ...]]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    if not norm:
+        return None
+    return tuple(x / norm for x in vector)
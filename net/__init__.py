@@ -0,0 +1,6 @@
+from .pool import ConnectionPool, HTTPStatusError
+
+__all__ = [
+    "ConnectionPool",
+    "HTTPStatusError",
+]
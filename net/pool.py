@@ -0,0 +1,196 @@
+"""
+Keep-alive HTTP connections built on http.client.
+Reuses TCP/TLS sockets across requests without adding an HTTP client dependency.
+"""
+from __future__ import annotations
+
+import http.client
+import logging
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_MAXSIZE = 4
+
+# Errors that mean an idle keep-alive socket was closed by the server while parked.
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class HTTPStatusError(RuntimeError):
+    """
+    Raised for 4xx/5xx responses. Carries the status code and the raw response body.
+    """
+
+    def __init__(self, status: int, body: bytes):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.body = body
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of persistent connections to a single scheme://host:port.
+    Never blocks: when every connection is busy a new one is opened, and at most
+    `maxsize` idle connections are kept for reuse.
+
+    `timeout` bounds each read; `connect_timeout` (default: same) bounds TCP connect
+    and TLS handshake. With `retries`, connection errors and `status_forcelist`
+    responses are retried after backoff_factor * 2**attempt seconds.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        maxsize: int = DEFAULT_MAXSIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+        connect_timeout: Optional[float] = None,
+        retries: int = 0,
+        backoff_factor: float = 0.0,
+        status_forcelist: Tuple[int, ...] = (),
+    ):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL for connection pool: {base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = frozenset(status_forcelist)
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context() if parts.scheme == "https" else None
+
+    @contextmanager
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[http.client.HTTPResponse]:
+        """
+        Send a request and yield the response. The connection goes back to the pool
+        only if the body was read to the end and the server allows keep-alive.
+        Raises HTTPStatusError for 4xx/5xx responses.
+        Retries happen only before the response is yielded.
+        """
+        conn, resp = self._send_with_retries(method, path, body, dict(headers or {}), timeout or self.timeout)
+        try:
+            if resp.status >= 400:
+                raise HTTPStatusError(resp.status, resp.read())
+            yield resp
+        finally:
+            if resp.isclosed() and not resp.will_close:
+                self._release(conn)
+            else:
+                conn.close()
+
+    def post(
+        self,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> bytes:
+        """
+        POST and return the full response body.
+        """
+        with self.request("POST", path, body=body, headers=headers, timeout=timeout) as resp:
+            return resp.read()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _send_with_retries(
+        self, method: str, path: str, body, headers: Dict[str, str], timeout: float
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        attempt = 0
+        while True:
+            try:
+                conn, resp = self._send(method, path, body, headers, timeout)
+            except OSError as exc:
+                if attempt >= self.retries:
+                    raise
+                logger.debug("Request to %s failed (%s); retrying.", self.host, exc)
+            else:
+                if resp.status not in self.status_forcelist or attempt >= self.retries:
+                    return conn, resp
+                # Drain so the connection can be reused for the retry.
+                resp.read()
+                if resp.will_close:
+                    conn.close()
+                else:
+                    self._release(conn)
+                logger.debug("%s returned %s; retrying.", self.host, resp.status)
+            time.sleep(self.backoff_factor * (2**attempt))
+            attempt += 1
+
+    def _send(
+        self, method: str, path: str, body, headers: Dict[str, str], timeout: float
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        conn, reused = self._acquire(timeout)
+        try:
+            return conn, self._roundtrip(conn, method, path, body, headers, timeout)
+        except _STALE_ERRORS as exc:
+            conn.close()
+            if not reused:
+                raise
+            logger.debug("Reused connection to %s was stale (%s); reconnecting.", self.host, exc)
+        except BaseException:
+            conn.close()
+            raise
+
+        conn = self._new_connection(timeout)
+        try:
+            return conn, self._roundtrip(conn, method, path, body, headers, timeout)
+        except BaseException:
+            conn.close()
+            raise
+
+    def _roundtrip(
+        self, conn: http.client.HTTPConnection, method: str, path: str, body, headers: Dict[str, str], timeout: float
+    ) -> http.client.HTTPResponse:
+        if conn.sock is None and self.connect_timeout is not None:
+            conn.timeout = self.connect_timeout
+            conn.connect()
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        conn.request(method, path, body=body, headers=headers)
+        return conn.getresponse()
+
+    def _acquire(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._new_connection(timeout), False
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
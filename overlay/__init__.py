@@ -1,16 +1,29 @@
-from .render import render_overlay, render_empty_overlay
 from .state import write_state, clear_state
+from .writer import OverlayWriter
+from .watch import FileChangeNotifier
 from .context_store import write_context, read_context
-from .gamestate_store import write_gamestate, read_gamestate, read_gamestate_log
+from .gamestate_store import GamestateLogTail, write_gamestate, read_gamestate, read_gamestate_log
 
 __all__ = [
     "render_overlay",
     "render_empty_overlay",
     "write_state",
     "clear_state",
+    "OverlayWriter",
+    "FileChangeNotifier",
     "write_context",
     "read_context",
     "write_gamestate",
     "read_gamestate",
     "read_gamestate_log",
+    "GamestateLogTail",
 ]
+
+
+def __getattr__(name: str):
+    # The PNG renderer needs Pillow; import it only when someone actually renders.
+    if name in ("render_overlay", "render_empty_overlay"):
+        from . import render
+
+        return getattr(render, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
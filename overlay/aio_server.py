@@ -0,0 +1,231 @@
+"""
+aiohttp variant of the overlay server, used when aiohttp is installed.
+Same routes and payloads as overlay/server.py, served from one event loop instead of
+a thread per request. File reads reuse the server's mtime-gated body cache.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+import threading
+from pathlib import Path
+from typing import Optional
+
+from config import write_bytes_atomic, write_json_atomic
+
+from .server import (
+    CONTEXT_DEFAULTS,
+    SSE_KEEPALIVE,
+    STATE_DEFAULTS,
+    append_log_line,
+    flush_logs,
+    gamestate_record,
+    parse_json_body,
+    read_json_body,
+)
+from .watch import FileChangeNotifier
+
+try:
+    from aiohttp import web  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    web = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+_CORS = {"Access-Control-Allow-Origin": "*"}
+
+
+def aiohttp_available() -> bool:
+    return web is not None
+
+
+class AioOverlayServer:
+    """
+    Mirrors the parts of the HTTPServer API the CLI uses: serve_forever(), shutdown(),
+    server_close() and server_port.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        state_path: Path,
+        static_dir: Path,
+        context_path: Path,
+        gamestate_path: Path,
+        gamestate_log_path: Path,
+    ):
+        if web is None:
+            raise RuntimeError("aiohttp is not installed.")
+        self.host = host
+        self.port = port
+        self.state_path = state_path
+        self.static_dir = static_dir
+        self.context_path = context_path
+        self.gamestate_path = gamestate_path
+        self.gamestate_log_path = gamestate_log_path
+        self.server_port = port
+        self._loop = asyncio.new_event_loop()
+        self._runner: Optional["web.AppRunner"] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+        self._notifier: Optional[FileChangeNotifier] = None
+
+    def start(self) -> None:
+        """
+        Run the server on a daemon thread and return once it is listening.
+        """
+        thread = threading.Thread(target=self.serve_forever, name="overlay-aiohttp", daemon=True)
+        thread.start()
+        self._ready.wait()
+
+    def serve_forever(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._ready.set()
+
+    def shutdown(self) -> None:
+        if self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def server_close(self) -> None:
+        self.shutdown()
+
+    async def _serve(self) -> None:
+        self._stopped = asyncio.Event()
+        app = web.Application()
+        app.router.add_get("/state", self._get_state)
+        app.router.add_get("/events", self._get_events)
+        app.router.add_get("/context", self._get_context)
+        app.router.add_post("/context", self._post_context)
+        app.router.add_get("/gamestate", self._get_gamestate)
+        app.router.add_post("/gamestate", self._post_gamestate)
+        app.router.add_route("OPTIONS", "/{tail:.*}", self._options)
+        app.router.add_get("/", self._index)
+        app.router.add_static("/", self.static_dir)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        # Bind ourselves so port=0 works and server_port reports the real port.
+        sock = socket.create_server((self.host, self.port))
+        self.server_port = sock.getsockname()[1]
+        await web.SockSite(self._runner, sock).start()
+        self._ready.set()
+        try:
+            await self._stopped.wait()
+        finally:
+            await self._runner.cleanup()
+            flush_logs()
+
+    async def _json_file(self, path: Path, defaults: dict, label: str) -> "web.Response":
+        body, _ = await asyncio.to_thread(read_json_body, path, defaults, label)
+        return web.Response(body=body, content_type="application/json", headers=_CORS)
+
+    async def _get_state(self, request: "web.Request") -> "web.Response":
+        return await self._json_file(self.state_path, STATE_DEFAULTS, "state file")
+
+    async def _get_context(self, request: "web.Request") -> "web.Response":
+        return await self._json_file(self.context_path, CONTEXT_DEFAULTS, "context file")
+
+    async def _get_gamestate(self, request: "web.Request") -> "web.Response":
+        return await self._json_file(self.gamestate_path, {}, "gamestate")
+
+    async def _get_events(self, request: "web.Request") -> "web.StreamResponse":
+        if self._notifier is None:
+            self._notifier = FileChangeNotifier(self.state_path)
+        notifier = self._notifier
+        resp = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache", **_CORS}
+        )
+        await resp.prepare(request)
+        seen = notifier.version
+        last_body = None
+        changed = True
+        try:
+            while True:
+                if changed:
+                    body, complete = await asyncio.to_thread(
+                        read_json_body, self.state_path, STATE_DEFAULTS, "state file"
+                    )
+                    if complete and body != last_body:
+                        await resp.write(b"data: " + body + b"\n\n")
+                        last_body = body
+                else:
+                    await resp.write(b": keepalive\n\n")
+                version = await _wait_for_change(notifier, seen, SSE_KEEPALIVE)
+                changed, seen = version != seen, version
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        return resp
+
+    async def _post_context(self, request: "web.Request") -> "web.Response":
+        try:
+            data = parse_json_body(await request.read())
+            if not isinstance(data, dict):
+                raise ValueError("invalid payload")
+            await asyncio.to_thread(write_json_atomic, self.context_path, data)
+            status = 204
+        except Exception as exc:  # pragma: no cover
+            logger.warning("Failed to write context: %s", exc)
+            status = 400
+        return web.Response(status=status, headers=_CORS)
+
+    async def _post_gamestate(self, request: "web.Request") -> "web.Response":
+        try:
+            record = gamestate_record(await request.read())
+            await asyncio.to_thread(write_bytes_atomic, self.gamestate_path, record)
+            await asyncio.to_thread(append_log_line, self.gamestate_log_path, record + b"\n")
+            status = 204
+        except Exception as exc:  # pragma: no cover
+            logger.warning("Failed to write gamestate: %s", exc)
+            status = 400
+        return web.Response(status=status, headers=_CORS)
+
+    async def _options(self, request: "web.Request") -> "web.Response":
+        return web.Response(
+            status=204,
+            headers={
+                **_CORS,
+                "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+                "Access-Control-Allow-Headers": "Content-Type",
+            },
+        )
+
+    async def _index(self, request: "web.Request") -> "web.FileResponse":
+        return web.FileResponse(self.static_dir / "index.html")
+
+
+async def _wait_for_change(notifier: FileChangeNotifier, since: int, timeout: float) -> int:
+    if notifier.event_driven:
+        return await _wait_for_push(notifier, since, timeout)
+    # Polls instead of blocking an executor thread, so idle streams never hold up shutdown.
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    version = notifier.poll()
+    while version == since and loop.time() < deadline:
+        await asyncio.sleep(notifier.poll_interval)
+        version = notifier.poll()
+    return version
+
+
+async def _wait_for_push(notifier: FileChangeNotifier, since: int, timeout: float) -> int:
+    # watchdog's thread wakes this loop directly; an idle stream sleeps until the keepalive.
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+
+    def wake() -> None:
+        loop.call_soon_threadsafe(changed.set)
+
+    notifier.add_listener(wake)
+    try:
+        # Checked after subscribing, so a change in between is not missed.
+        if notifier.version == since:
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        notifier.remove_listener(wake)
+    return notifier.version
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import json
 import time
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from config import json_loads, write_json_atomic
+
 
 def write_context(path: str | Path, url: str | None = None, selection: str | None = None) -> Path:
     payload: Dict[str, Any] = {
@@ -12,18 +13,13 @@ def write_context(path: str | Path, url: str | None = None, selection: str | Non
         "selection": selection or "",
         "ts": time.time(),
     }
-    out_path = Path(path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
-    return out_path
+    return write_json_atomic(path, payload)
 
 
 def read_context(path: str | Path) -> Dict[str, Any]:
-    p = Path(path)
-    if not p.exists():
-        return {"url": "", "selection": "", "ts": 0}
+    # One open() instead of exists() + read; a missing file lands in the except.
     try:
-        data = json.loads(p.read_text(encoding="utf-8"))
+        data = json_loads(Path(path).read_bytes())
         if isinstance(data, dict):
             return {
                 "url": data.get("url", "") or "",
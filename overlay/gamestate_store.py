@@ -1,44 +1,170 @@
 from __future__ import annotations
 
-import json
+import mmap
+import os
+import threading
 import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import json_loads, json_loads_many, write_json_atomic
+
+# Ranges at least this large are parsed as one batch; below it the per-line loop is as fast.
+BATCH_PARSE_MIN_BYTES = 256 * 1024
+
+# Bytes from each end of the cached prefix compared on every call, so a file rewritten
+# in place (or recreated on a reused inode) is not mistaken for an append.
+FINGERPRINT_BYTES = 4096
+
+# Bytes before a tail's offset re-read on each poll to spot in-place rewrites.
+TAIL_ANCHOR_BYTES = 256
+
+# Per log file: (inode, byte offset just past the last complete line, fingerprint of
+# the bytes before that offset, events parsed up to there).
+_LOG_CACHE: Dict[str, Tuple[int, int, bytes, List[Dict[str, Any]]]] = {}
+_LOG_CACHE_LOCK = threading.Lock()
 
 
 def write_gamestate(path: str | Path, data: Dict[str, Any]) -> Path:
     payload = dict(data)
     payload.setdefault("ts", time.time())
-    out_path = Path(path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
-    return out_path
+    return write_json_atomic(path, payload)
 
 
 def read_gamestate(path: str | Path) -> Dict[str, Any]:
-    p = Path(path)
-    if not p.exists():
-        return {}
+    # One open() instead of exists() + read; a missing file lands in the except.
     try:
-        data = json.loads(p.read_text(encoding="utf-8"))
+        data = json_loads(Path(path).read_bytes())
         return data if isinstance(data, dict) else {}
     except Exception:
         return {}
 
 
 def read_gamestate_log(path: str | Path) -> List[Dict[str, Any]]:
-    p = Path(path)
-    if not p.exists():
+    """
+    Parse every event in a JSONL gamestate log. The file is memory-mapped rather than
+    read and split, and complete lines parsed by earlier calls are cached, so a call
+    only parses what was appended since the last one. The returned dicts are shallow
+    copies; nested values are shared with the cache and must not be mutated.
+    """
+    key = os.path.abspath(path)
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            with _LOG_CACHE_LOCK:
+                ino, offset, fingerprint, events = _LOG_CACHE.get(key, (st.st_ino, 0, b"", []))
+                if ino != st.st_ino or st.st_size < offset:
+                    # Replaced or truncated: parse the new file from the start.
+                    offset, events = 0, []
+                if st.st_size == 0:
+                    _LOG_CACHE[key] = (st.st_ino, 0, b"", [])
+                    return []
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if offset and _prefix_fingerprint(mm, offset) != fingerprint:
+                        # Rewritten in place or recreated: the cached prefix is stale.
+                        offset, events = 0, []
+                    cut = mm.rfind(b"\n", offset) + 1 or offset
+                    if cut > offset:
+                        events.extend(_parse_jsonl(mm, offset, cut))
+                    _LOG_CACHE[key] = (st.st_ino, cut, _prefix_fingerprint(mm, cut), events)
+                    # An unterminated last line is parsed every time but never cached.
+                    tail = _parse_jsonl(mm, cut) if cut < len(mm) else []
+                return [dict(event) for event in events] + tail
+    except Exception:
         return []
+
+
+def _prefix_fingerprint(buf, end: int) -> bytes:
+    # First and last FINGERPRINT_BYTES of buf[:end]; appends never change either.
+    return buf[: min(end, FINGERPRINT_BYTES)] + buf[max(0, end - FINGERPRINT_BYTES) : end]
+
+
+def _parse_jsonl(buf, start: int = 0, end: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Parse newline-delimited JSON objects in buf[start:end], skipping blank or invalid lines.
+    Newlines are located with find() (memchr) instead of building a list of lines first.
+    """
+    if end is None:
+        end = len(buf)
+    if end - start >= BATCH_PARSE_MIN_BYTES:
+        lines = [line for line in buf[start:end].split(b"\n") if line.strip()]
+        try:
+            return [obj for obj in json_loads_many(lines) if isinstance(obj, dict)]
+        except ValueError:
+            pass  # at least one bad line; fall back to skipping them individually
     events: List[Dict[str, Any]] = []
-    try:
-        for line in p.read_text(encoding="utf-8", errors="replace").splitlines():
+    while start < end:
+        nl = buf.find(b"\n", start, end)
+        stop = end if nl == -1 else nl
+        if stop > start:
             try:
-                obj = json.loads(line)
+                obj = json_loads(buf[start:stop])
                 if isinstance(obj, dict):
                     events.append(obj)
             except Exception:
-                continue
-    except Exception:
-        return []
+                pass
+        start = stop + 1
     return events
+
+
+class GamestateLogTail:
+    """
+    Incrementally read events appended to a gamestate JSONL log.
+    Remembers the byte offset so each poll only parses lines written since the last one.
+    A replaced, truncated or rewritten file (detected by inode, mtime going backwards,
+    or the bytes just before the offset changing) is read again from the start.
+    """
+
+    def __init__(self, path: str | Path, from_end: bool = True):
+        self.path = Path(path)
+        self._offset = 0
+        self._partial = b""
+        self._ino = -1
+        self._mtime_ns = 0
+        # Last bytes before _offset; appends never change them, rewrites almost always do.
+        self._anchor = b""
+        if from_end:
+            try:
+                with self.path.open("rb") as f:
+                    st = os.fstat(f.fileno())
+                    self._ino, self._mtime_ns = st.st_ino, st.st_mtime_ns
+                    self._offset = st.st_size
+                    f.seek(max(0, self._offset - TAIL_ANCHOR_BYTES))
+                    self._anchor = f.read(self._offset - f.tell())
+            except OSError:
+                self._offset = 0
+
+    def read_new(self) -> List[Dict[str, Any]]:
+        try:
+            st = self.path.stat()
+        except OSError:
+            return []
+        if st.st_ino != self._ino or st.st_size < self._offset or st.st_mtime_ns < self._mtime_ns:
+            # Replaced, truncated or restored: start over from the beginning of the file.
+            self._restart()
+        if st.st_size == self._offset and st.st_mtime_ns == self._mtime_ns:
+            return []
+        self._ino, self._mtime_ns = st.st_ino, st.st_mtime_ns
+
+        with self.path.open("rb") as f:
+            f.seek(self._offset - len(self._anchor))
+            data = f.read(st.st_size - f.tell())
+            if not data.startswith(self._anchor):
+                # Rewritten in place past the old offset: the bytes we read are not ours.
+                self._restart()
+                f.seek(0)
+                data = f.read(st.st_size)
+        chunk = data[len(self._anchor) :]
+        self._offset += len(chunk)
+        self._anchor = data[-TAIL_ANCHOR_BYTES:] if chunk else self._anchor
+
+        data = self._partial + chunk
+        # Keep an unterminated trailing line until the writer finishes it.
+        cut = data.rfind(b"\n") + 1
+        self._partial = data[cut:]
+        return _parse_jsonl(data, 0, cut)
+
+    def _restart(self) -> None:
+        self._offset = 0
+        self._partial = b""
+        self._anchor = b""
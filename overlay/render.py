@@ -1,13 +1,19 @@
 """
 Overlay renderer for speech/thought bubbles.
-Generates a transparent PNG you can add as an image source in Streamlabs/OBS.
+Generates a transparent PNG (or lossless WebP) you can add as an image source in Streamlabs/OBS.
 """
 from __future__ import annotations
 
+import functools
+import hashlib
+import io
 import logging
+import os
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
 from PIL import Image, ImageDraw, ImageFont
 
@@ -16,6 +22,24 @@ logger = logging.getLogger(__name__)
 DEFAULT_SIZE = (1000, 260)
 DEFAULT_FONT_CACHE: Dict[int, ImageFont.FreeTypeFont | ImageFont.ImageFont] = {}
 DEFAULT_FONT_SIZE = 30
+# Encoded images by (format, mode, font size, canvas size, text); re-renders of the same bubble are a file write.
+PNG_CACHE_MAX = 64
+# zlib level 1 is several times faster than Pillow's default and the overlay is local-only.
+PNG_COMPRESS_LEVEL = 1
+IMAGE_FORMATS = ("PNG", "WEBP")
+
+_PNG_CACHE: "OrderedDict[str, bytes]" = OrderedDict()
+_PNG_CACHE_LOCK = threading.Lock()
+# Wrapped text by (font size, max width, cleaned text); streaming replies re-wrap the same prefix often.
+WRAP_CACHE_MAX = 256
+_WRAP_CACHE: Dict[Tuple[int, int, str], str] = {}
+_WRAP_CACHE_LOCK = threading.Lock()
+# Per output file: (render signature, mtime_ns we left it with). Lets an identical re-render return at once.
+_LAST_RENDER: Dict[str, Tuple[tuple, int]] = {}
+_LAST_RENDER_LOCK = threading.Lock()
+# Pre-drawn bubble shapes by (mode, width, height).
+_CHROME_CACHE: Dict[Tuple[str, int, int], Image.Image] = {}
+_CHROME_CACHE_LOCK = threading.Lock()
 
 
 @dataclass
@@ -44,21 +68,167 @@ def render_overlay(
     mode: str = "speak",
     font_size: int = DEFAULT_FONT_SIZE,
     size: Tuple[int, int] = DEFAULT_SIZE,
+    image_format: Optional[str] = None,
 ) -> Path:
     """
     Render a bubble overlay with the given text and save to output_path.
     mode: "speak" or "think" (chooses colors/shapes).
+    image_format: "PNG" or "WEBP" (lossless); defaults from the output_path suffix.
     """
+    image_format = _resolve_format(output_path, image_format)
     cleaned = _clean_text(text)
     if not cleaned:
-        return render_empty_overlay(output_path, size=size)
+        return render_empty_overlay(output_path, size=size, image_format=image_format)
+
+    signature = (image_format, mode, font_size, tuple(size), cleaned)
+    if _already_rendered(output_path, signature):
+        return Path(output_path)
+
+    key = _png_cache_key(f"{image_format}:{mode}", font_size, size, cleaned)
+    cached = _png_cache_get(key)
+    if cached is not None:
+        logger.debug("Overlay cache hit for %s", output_path)
+        out_path = _write_image(output_path, cached)
+        _remember_render(out_path, signature)
+        return out_path
 
     theme = SPEAK_THEME if mode == "speak" else THINK_THEME
     width, height = size
-    img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    padding = 24
+    # The bubble shape never changes for a given mode and size; only the text is drawn per frame.
+    img = _get_chrome(mode, size).copy()
     draw = ImageDraw.Draw(img)
     font = _get_font(font_size)
 
+    # Text
+    text_box = (padding + 12, padding + 12, width - padding - 24, height - padding - 56)
+    wrapped = _wrap_cached(draw, cleaned, text_box[2] - text_box[0], font, font_size)
+    draw.multiline_text(
+        (text_box[0], text_box[1]),
+        wrapped,
+        fill=theme.text,
+        font=font,
+        spacing=4,
+    )
+
+    data = _encode_image(img, image_format)
+    _png_cache_put(key, data)
+    out_path = _write_image(output_path, data)
+    _remember_render(out_path, signature)
+    logger.info("Overlay saved to %s", out_path)
+    return out_path
+
+
+def render_empty_overlay(
+    output_path: str | Path, size: Tuple[int, int] = DEFAULT_SIZE, image_format: Optional[str] = None
+) -> Path:
+    """
+    Write a fully transparent image to clear the overlay.
+    """
+    image_format = _resolve_format(output_path, image_format)
+    signature = (image_format, "empty", 0, tuple(size), "")
+    if _already_rendered(output_path, signature):
+        return Path(output_path)
+    key = _png_cache_key(f"{image_format}:empty", 0, size, "")
+    data = _png_cache_get(key)
+    if data is None:
+        data = _encode_image(Image.new("RGBA", size, (0, 0, 0, 0)), image_format)
+        _png_cache_put(key, data)
+    out_path = _write_image(output_path, data)
+    _remember_render(out_path, signature)
+    logger.info("Overlay cleared at %s", out_path)
+    return out_path
+
+
+def _already_rendered(output_path: str | Path, signature: tuple) -> bool:
+    """
+    True if we last wrote this exact overlay to output_path and nothing has touched it since.
+    """
+    with _LAST_RENDER_LOCK:
+        last = _LAST_RENDER.get(os.path.abspath(output_path))
+    if last is None or last[0] != signature:
+        return False
+    try:
+        return os.stat(output_path).st_mtime_ns == last[1]
+    except OSError:
+        return False
+
+
+def _remember_render(out_path: Path, signature: tuple) -> None:
+    try:
+        mtime_ns = os.stat(out_path).st_mtime_ns
+    except OSError:
+        return
+    with _LAST_RENDER_LOCK:
+        _LAST_RENDER[os.path.abspath(out_path)] = (signature, mtime_ns)
+
+
+def _resolve_format(output_path: str | Path, image_format: Optional[str]) -> str:
+    if image_format is None:
+        image_format = "WEBP" if Path(output_path).suffix.lower() == ".webp" else "PNG"
+    image_format = image_format.upper()
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported overlay image format: {image_format}")
+    return image_format
+
+
+def _encode_image(img: Image.Image, image_format: str) -> bytes:
+    buf = io.BytesIO()
+    if image_format == "WEBP":
+        # Lossless with the fastest method; quality only trades encode effort for size here.
+        img.save(buf, "WEBP", lossless=True, quality=0, method=0)
+    else:
+        img.save(buf, "PNG", compress_level=PNG_COMPRESS_LEVEL, optimize=False)
+    return buf.getvalue()
+
+
+def _write_image(output_path: str | Path, data: bytes) -> Path:
+    out_path = Path(output_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_bytes(data)
+    return out_path
+
+
+def _png_cache_key(mode: str, font_size: int, size: Tuple[int, int], cleaned: str) -> str:
+    raw = f"{mode}|{font_size}|{size[0]}x{size[1]}|{cleaned}".encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def _png_cache_get(key: str) -> Optional[bytes]:
+    with _PNG_CACHE_LOCK:
+        data = _PNG_CACHE.get(key)
+        if data is not None:
+            _PNG_CACHE.move_to_end(key)
+        return data
+
+
+def _png_cache_put(key: str, data: bytes) -> None:
+    with _PNG_CACHE_LOCK:
+        _PNG_CACHE[key] = data
+        _PNG_CACHE.move_to_end(key)
+        while len(_PNG_CACHE) > PNG_CACHE_MAX:
+            _PNG_CACHE.popitem(last=False)
+
+
+def _get_chrome(mode: str, size: Tuple[int, int]) -> Image.Image:
+    """
+    Return the cached bubble body and tail/dots for this mode and canvas size.
+    Callers must copy() it before drawing.
+    """
+    key = (mode, size[0], size[1])
+    with _CHROME_CACHE_LOCK:
+        chrome = _CHROME_CACHE.get(key)
+        if chrome is None:
+            chrome = _CHROME_CACHE[key] = _build_chrome(mode, size)
+        return chrome
+
+
+def _build_chrome(mode: str, size: Tuple[int, int]) -> Image.Image:
+    theme = SPEAK_THEME if mode == "speak" else THINK_THEME
+    width, height = size
+    img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+
     # Bubble body
     padding = 24
     if mode == "think":
@@ -92,8 +262,8 @@ def render_overlay(
         base_y = rect[3] + 10
         bubble_sizes = [20, 26, 32]
         offsets = [0, 26, 56]
-        for size, offset in zip(bubble_sizes, offsets):
-            r = size
+        for dot_size, offset in zip(bubble_sizes, offsets):
+            r = dot_size
             cx = center_x - r // 2
             cy = base_y + offset
             draw.ellipse(
@@ -102,55 +272,56 @@ def render_overlay(
                 outline=theme.border,
             )
 
-    # Text
-    text_box = (padding + 12, padding + 12, width - padding - 24, height - padding - 56)
-    wrapped = wrap_text(draw, cleaned, text_box[2] - text_box[0], font=font)
-    draw.multiline_text(
-        (text_box[0], text_box[1]),
-        wrapped,
-        fill=theme.text,
-        font=font,
-        spacing=4,
-    )
-
-    out_path = Path(output_path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    img.save(out_path, "PNG")
-    logger.info("Overlay saved to %s", out_path)
-    return out_path
+    return img
 
 
-def render_empty_overlay(output_path: str | Path, size: Tuple[int, int] = DEFAULT_SIZE) -> Path:
+def wrap_text(draw: ImageDraw.ImageDraw, text: str, max_width: int, font) -> str:
     """
-    Write a fully transparent image to clear the overlay.
+    Greedy word wrap. Each word and the space are measured once and summed,
+    instead of re-measuring the whole candidate line for every word.
     """
-    width, height = size
-    img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-    out_path = Path(output_path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    img.save(out_path, "PNG")
-    logger.info("Overlay cleared at %s", out_path)
-    return out_path
+    if hasattr(font, "getlength"):
+        measure = font.getlength
+    else:  # older Pillow
 
+        def measure(segment: str) -> float:
+            return _measure(draw, segment, font)[0]
 
-def wrap_text(draw: ImageDraw.ImageDraw, text: str, max_width: int, font) -> str:
-    words = text.split()
+    space_w = measure(" ")
     lines = []
     current = []
-    for word in words:
-        candidate = " ".join(current + [word])
-        w, _ = _measure(draw, candidate, font)
-        if w <= max_width:
+    cur_w = 0.0
+    for word in text.split():
+        word_w = measure(word)
+        candidate_w = cur_w + space_w + word_w if current else word_w
+        if candidate_w <= max_width:
             current.append(word)
+            cur_w = candidate_w
         else:
             if current:
                 lines.append(" ".join(current))
             current = [word]
+            cur_w = word_w
     if current:
         lines.append(" ".join(current))
     return "\n".join(lines)
 
 
+def _wrap_cached(draw: ImageDraw.ImageDraw, cleaned: str, max_width: int, font, font_size: int) -> str:
+    key = (font_size, max_width, cleaned)
+    with _WRAP_CACHE_LOCK:
+        wrapped = _WRAP_CACHE.get(key)
+    if wrapped is not None:
+        return wrapped
+    wrapped = wrap_text(draw, cleaned, max_width, font=font)
+    with _WRAP_CACHE_LOCK:
+        if len(_WRAP_CACHE) >= WRAP_CACHE_MAX:
+            # Dicts keep insertion order, so this drops the oldest entry.
+            del _WRAP_CACHE[next(iter(_WRAP_CACHE))]
+        _WRAP_CACHE[key] = wrapped
+    return wrapped
+
+
 def _measure(draw: ImageDraw.ImageDraw, text: str, font) -> tuple[int, int]:
     """
     Measure text width/height with Pillow version compatibility.
@@ -176,6 +347,7 @@ def _get_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
         return DEFAULT_FONT_CACHE[size]
 
 
+@functools.lru_cache(maxsize=256)
 def _clean_text(text: str) -> str:
     cleaned = text.strip()
     # Remove enclosing quotes if present
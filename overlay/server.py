@@ -1,40 +1,270 @@
 """
 Lightweight overlay server.
 Serves static HTML/CSS/JS and exposes /state reading a JSON file written by the CLI.
+/events pushes the same state as Server-Sent Events whenever the file changes.
+Runs on aiohttp when installed (see aio_server.py), otherwise on http.server threads.
 """
 from __future__ import annotations
 
 import argparse
-import json
+import atexit
+import hashlib
 import logging
+import mimetypes
+import os
 import threading
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple
 from urllib.parse import urlparse
 
+from config import json_dumps, json_loads, write_bytes_atomic, write_json_atomic
+
+from .watch import FileChangeNotifier
+
 logger = logging.getLogger(__name__)
 
+# Send an SSE comment this often so dead clients are noticed and proxies keep the stream open.
+SSE_KEEPALIVE = 15.0
+
+STATE_DEFAULTS = {"mode": "clear", "text": "", "font_size": 30, "ts": 0}
+CONTEXT_DEFAULTS = {"url": "", "selection": "", "ts": 0}
+
+# path -> ((mtime_ns, size) or _MISSING, response body) for the JSON files served over GET.
+_MISSING = object()
+# Status line and headers for JSON bodies, written together with the body in one call.
+_JSON_RESPONSE_HEAD = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Content-Length: %d\r\n"
+    b"\r\n"
+)
+_BODY_CACHE: Dict[Path, Tuple[object, bytes]] = {}
+_BODY_CACHE_LOCK = threading.Lock()
+# Gamestate log lines are batched and written this often (or once this many are waiting).
+LOG_FLUSH_INTERVAL = 0.25
+LOG_FLUSH_MAX_LINES = 256
+# Append handles for the gamestate log, kept open across POSTs, and lines not yet written.
+_LOG_FILES: Dict[Path, BinaryIO] = {}
+_LOG_PENDING: Dict[Path, List[bytes]] = {}
+_LOG_LOCK = threading.Lock()
+_LOG_FLUSHER: Optional[threading.Thread] = None
+
+
+class StaticAsset(NamedTuple):
+    path: Path
+    content_type: str
+    etag: str
+    signature: Tuple[int, int]  # (mtime_ns, size) the entry was built from
+    body: Optional[bytes]  # None for files sent with sendfile()
+
+
+# Static files up to this size are kept in memory; larger ones are sent from disk with sendfile().
+STATIC_PRELOAD_MAX = 64 * 1024
+
+
+def load_static_assets(static_dir: Path) -> Dict[str, StaticAsset]:
+    """
+    Index static_dir by URL path ("/" maps to index.html).
+    """
+    assets: Dict[str, StaticAsset] = {}
+    for path in sorted(static_dir.rglob("*")):
+        if path.is_file():
+            assets["/" + path.relative_to(static_dir).as_posix()] = _load_static_asset(path)
+    if "/index.html" in assets:
+        assets["/"] = assets["/index.html"]
+    return assets
+
+
+def _load_static_asset(path: Path) -> StaticAsset:
+    st = path.stat()
+    signature = (st.st_mtime_ns, st.st_size)
+    content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if st.st_size <= STATIC_PRELOAD_MAX:
+        body = path.read_bytes()
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+    else:
+        body = None
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    return StaticAsset(path, content_type, etag, signature, body)
+
+
+def parse_json_body(raw: bytes):
+    """
+    Parse JSON bytes (orjson when installed). Bodies that aren't valid UTF-8 are
+    decoded with replacement characters and retried, as the stdlib path always did.
+    """
+    try:
+        return json_loads(raw)
+    except ValueError:
+        return json_loads(raw.decode("utf-8", errors="replace"))
+
+
+def gamestate_record(raw: bytes) -> bytes:
+    """
+    Validate a POSTed gamestate object and return the JSON bytes to store. A body that
+    is already one line of UTF-8 JSON is stored as sent; anything else is re-serialized.
+    Raises ValueError if the body is not a JSON object.
+    """
+    body = raw.strip()
+    try:
+        data = json_loads(body)
+        reusable = body.startswith(b"{") and b"\n" not in body and b"\x00" not in body
+    except ValueError:
+        data = parse_json_body(raw)
+        reusable = False
+    if not isinstance(data, dict):
+        raise ValueError("invalid payload")
+    return body if reusable else json_dumps(data)
+
+
+def read_json_body(path: Path, defaults: dict, label: str) -> Tuple[bytes, bool]:
+    """
+    Return the JSON body for `path` merged over `defaults`, and whether it reflects the
+    file (False if the read failed). Bodies are cached per (mtime_ns, size), so unchanged
+    files cost one stat; a missing file is served (and cached) as the defaults.
+    """
+    try:
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = _MISSING
+    with _BODY_CACHE_LOCK:
+        cached = _BODY_CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1], True
+
+    data = dict(defaults)
+    try:
+        with open(path, "rb") as f:
+            # Key the cache by the file actually read, in case it was replaced after the stat.
+            st = os.fstat(f.fileno())
+            key = (st.st_mtime_ns, st.st_size)
+            raw = f.read()
+        loaded = parse_json_body(raw)
+    except FileNotFoundError:
+        key = _MISSING
+    except Exception as exc:  # pragma: no cover - best effort
+        logger.warning("Failed to read %s: %s", label, exc)
+        # Not cached, so the next request re-reads the file.
+        return json_dumps(data), False
+    else:
+        if isinstance(loaded, dict):
+            data.update(loaded)
+    body = json_dumps(data)
+    with _BODY_CACHE_LOCK:
+        _BODY_CACHE[path] = (key, body)
+    return body, True
+
+
+def append_log_line(path: Path, line: bytes) -> None:
+    """
+    Queue one complete line for `path`. A background thread writes queued lines every
+    LOG_FLUSH_INTERVAL seconds, one write() per file through a handle kept open between
+    batches (reopened if the file was deleted or replaced); a burst of
+    LOG_FLUSH_MAX_LINES is written right away.
+    """
+    global _LOG_FLUSHER
+    with _LOG_LOCK:
+        pending = _LOG_PENDING.setdefault(path, [])
+        pending.append(line)
+        if len(pending) >= LOG_FLUSH_MAX_LINES:
+            _write_pending_locked(path)
+        if _LOG_FLUSHER is None:
+            _LOG_FLUSHER = threading.Thread(target=_flush_logs_periodically, name="gamestate-log", daemon=True)
+            _LOG_FLUSHER.start()
+
+
+def flush_logs() -> None:
+    """
+    Write every queued log line now (on shutdown, or before reading the log back).
+    """
+    with _LOG_LOCK:
+        for path in list(_LOG_PENDING):
+            _write_pending_locked(path)
+
+
+def _write_pending_locked(path: Path) -> None:
+    lines = _LOG_PENDING.pop(path, None)
+    if not lines:
+        return
+    f = _LOG_FILES.get(path)
+    if f is not None and not _is_open_file(path, f):
+        # Deleted or replaced since it was opened: appending to the old inode would lose lines.
+        f.close()
+        f = None
+    if f is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unbuffered: the joined batch goes to the OS in a single write().
+        f = _LOG_FILES[path] = open(path, "ab", buffering=0)
+    f.write(b"".join(lines))
+
+
+def _is_open_file(path: Path, f: BinaryIO) -> bool:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    fst = os.fstat(f.fileno())
+    return (st.st_ino, st.st_dev) == (fst.st_ino, fst.st_dev)
+
+
+def _flush_logs_periodically() -> None:
+    while True:
+        time.sleep(LOG_FLUSH_INTERVAL)
+        try:
+            flush_logs()
+        except OSError as exc:  # pragma: no cover - disk errors
+            logger.warning("Failed to write gamestate log: %s", exc)
+
+
+@atexit.register
+def _close_log_files() -> None:
+    flush_logs()
+    with _LOG_LOCK:
+        files = list(_LOG_FILES.values())
+        _LOG_FILES.clear()
+    for f in files:
+        f.close()
+
 
 class OverlayHandler(SimpleHTTPRequestHandler):
+    # Keep-alive lets the overlay's polling reuse one connection; every response
+    # below therefore carries a Content-Length (or closes the connection).
+    protocol_version = "HTTP/1.1"
     state_path: Path
     static_dir: Path
     context_path: Path
     gamestate_path: Path
     gamestate_log_path: Path
+    # URL path -> StaticAsset, built when the server is created.
+    static_assets: Dict[str, StaticAsset] = {}
+    # Shared by every /events client of this server; created on first subscription.
+    _state_notifier: Optional[FileChangeNotifier] = None
+    _notifier_lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        # Files missing from static_assets fall back to SimpleHTTPRequestHandler rooted at static_dir.
+        super().__init__(*args, directory=os.fspath(self.static_dir), **kwargs)
 
     def log_message(self, format: str, *args) -> None:  # noqa: A003 - silence noisy GET logs
-        if "GET /state" in format % args:
+        message = format % args
+        if "GET /state" in message or "GET /events" in message:
             return
         super().log_message(format, *args)
 
     def do_GET(self):  # noqa: N802
         if self.path.rstrip("/") == "/state":
             self.serve_state()
+        elif self.path.rstrip("/") == "/events":
+            self.serve_events()
         elif self.path.rstrip("/") == "/context":
             self.serve_context()
         elif self.path.rstrip("/") == "/gamestate":
             self.serve_gamestate()
-        else:
+        elif not self.serve_static():
             return super().do_GET()
 
     def do_OPTIONS(self):  # noqa: N802
@@ -50,106 +280,179 @@ class OverlayHandler(SimpleHTTPRequestHandler):
             self.receive_context()
         elif parsed.path.rstrip("/") == "/gamestate":
             self.receive_gamestate()
-            return
-        self.send_response(404)
-        self.end_headers()
+        else:
+            # Drain the unread body so it isn't parsed as the next request on this connection.
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
 
     def serve_state(self) -> None:
-        data = {"mode": "clear", "text": "", "font_size": 30, "ts": 0}
-        try:
-            if self.state_path.exists():
-                raw = self.state_path.read_bytes()
-                loaded = json.loads(raw.decode("utf-8", errors="replace"))
-                if isinstance(loaded, dict):
-                    data.update(loaded)
-        except Exception as exc:  # pragma: no cover - best effort
-            logger.warning("Failed to read state file: %s", exc)
-
-        body = json.dumps(data).encode("utf-8")
+        body, _ = self._state_body()
+        self._send_json(body)
+
+    def serve_events(self) -> None:
+        """
+        Stream the state body as Server-Sent Events, one message per file change.
+        """
+        notifier = self._get_state_notifier()
+        seen = notifier.version
+        self.close_connection = True
         self.send_response(200)
-        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
         self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        self.wfile.write(body)
-
-    def serve_context(self) -> None:
-        data = {"url": "", "selection": "", "ts": 0}
+        last_body = None
+        changed = True
         try:
-            if self.context_path.exists():
-                raw = self.context_path.read_bytes()
-                loaded = json.loads(raw.decode("utf-8", errors="replace"))
-                if isinstance(loaded, dict):
-                    data.update(loaded)
-        except Exception as exc:  # pragma: no cover
-            logger.warning("Failed to read context file: %s", exc)
+            while True:
+                if changed:
+                    body, complete = self._state_body()
+                    # A torn read (file mid-write) is skipped; the write finishing triggers another change.
+                    if complete and body != last_body:
+                        self.wfile.write(b"data: " + body + b"\n\n")
+                        last_body = body
+                else:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+                version = notifier.wait(seen, timeout=SSE_KEEPALIVE)
+                changed, seen = version != seen, version
+        except (BrokenPipeError, ConnectionResetError):
+            return
 
-        body = json.dumps(data).encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+    def _state_body(self) -> Tuple[bytes, bool]:
+        return read_json_body(self.state_path, STATE_DEFAULTS, "state file")
+
+    def _get_state_notifier(self) -> FileChangeNotifier:
+        cls = type(self)
+        with cls._notifier_lock:
+            if cls._state_notifier is None:
+                cls._state_notifier = FileChangeNotifier(self.state_path)
+            return cls._state_notifier
+
+    def serve_context(self) -> None:
+        body, _ = read_json_body(self.context_path, CONTEXT_DEFAULTS, "context file")
+        self._send_json(body)
 
     def receive_context(self) -> None:
         length = int(self.headers.get("Content-Length", 0))
         raw = self.rfile.read(length) if length else b""
         try:
-            data = json.loads(raw.decode("utf-8", errors="replace"))
+            data = parse_json_body(raw)
             if not isinstance(data, dict):
                 raise ValueError("invalid payload")
-            self.context_path.parent.mkdir(parents=True, exist_ok=True)
-            self.context_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
-            self.send_response(204)
+            write_json_atomic(self.context_path, data)
+            status = 204
         except Exception as exc:  # pragma: no cover
             logger.warning("Failed to write context: %s", exc)
-            self.send_response(400)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.end_headers()
+            status = 400
+        self._send_empty(status)
 
     def serve_gamestate(self) -> None:
-        data = {}
-        try:
-            if self.gamestate_path.exists():
-                raw = self.gamestate_path.read_bytes()
-                loaded = json.loads(raw.decode("utf-8", errors="replace"))
-                if isinstance(loaded, dict):
-                    data.update(loaded)
-        except Exception as exc:  # pragma: no cover
-            logger.warning("Failed to read gamestate: %s", exc)
+        body, _ = read_json_body(self.gamestate_path, {}, "gamestate")
+        self._send_json(body)
 
-        body = json.dumps(data).encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
+    def _send_json(self, body: bytes) -> None:
+        self.log_request(200, len(body))
+        self.wfile.write(_JSON_RESPONSE_HEAD % len(body) + body)
+
+    def _send_empty(self, status: int) -> None:
+        self.send_response(status)
         self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Content-Length", str(len(body)))
+        if status != 204:  # 204 must not carry a Content-Length
+            self.send_header("Content-Length", "0")
         self.end_headers()
-        self.wfile.write(body)
 
     def receive_gamestate(self) -> None:
         length = int(self.headers.get("Content-Length", 0))
         raw = self.rfile.read(length) if length else b""
         try:
-            data = json.loads(raw.decode("utf-8", errors="replace"))
-            if not isinstance(data, dict):
-                raise ValueError("invalid payload")
-            self.gamestate_path.parent.mkdir(parents=True, exist_ok=True)
-            self.gamestate_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
-            # append to log
-            with self.gamestate_log_path.open("a", encoding="utf-8") as f:
-                f.write(json.dumps(data, ensure_ascii=False) + "\n")
-            self.send_response(204)
+            record = gamestate_record(raw)
+            write_bytes_atomic(self.gamestate_path, record)
+            append_log_line(self.gamestate_log_path, record + b"\n")
+            status = 204
         except Exception as exc:  # pragma: no cover
             logger.warning("Failed to write gamestate: %s", exc)
-            self.send_response(400)
-        self.send_header("Access-Control-Allow-Origin", "*")
+            status = 400
+        self._send_empty(status)
+
+    def serve_static(self) -> bool:
+        """
+        Serve a known static file from memory (or sendfile for large ones), answering
+        If-None-Match with 304. Returns False for paths that aren't in the index.
+        """
+        url_path = urlparse(self.path).path
+        asset = self.static_assets.get(url_path)
+        if asset is None:
+            return False
+        try:
+            st = os.stat(asset.path)
+        except OSError:
+            return False
+        if (st.st_mtime_ns, st.st_size) != asset.signature:
+            # Edited since startup: refresh this entry.
+            asset = _load_static_asset(asset.path)
+            self.static_assets[url_path] = asset
+
+        if self.headers.get("If-None-Match") == asset.etag:
+            self.send_response(304)
+            self.send_header("ETag", asset.etag)
+            self.end_headers()
+            return True
+        self.send_response(200)
+        self.send_header("Content-Type", asset.content_type)
+        self.send_header("Content-Length", str(asset.signature[1] if asset.body is None else len(asset.body)))
+        self.send_header("ETag", asset.etag)
+        self.send_header("Cache-Control", "no-cache")
         self.end_headers()
+        if asset.body is not None:
+            self.wfile.write(asset.body)
+        else:
+            with open(asset.path, "rb") as f:
+                self.connection.sendfile(f)
+        return True
 
-    def translate_path(self, path: str) -> str:  # serve static from static_dir
-        new_path = super().translate_path(path)
-        rel = Path(new_path).relative_to(Path.cwd())
-        return str(self.static_dir / rel)
+
+def _build_server(
+    host: str,
+    port: int,
+    state_path: Path,
+    static_dir: Path,
+    context_path: Path,
+    gamestate_path: Path,
+    gamestate_log_path: Path,
+    prefer_aiohttp: bool = True,
+):
+    """
+    Build the aiohttp server when available and preferred; otherwise bind a thread-per-request
+    server so the overlay page, SSE streams and POSTs don't queue behind each other.
+    Request threads are daemons and never delay shutdown.
+    """
+    if prefer_aiohttp:
+        from .aio_server import AioOverlayServer, aiohttp_available
+
+        if aiohttp_available():
+            return AioOverlayServer(
+                host, port, state_path, static_dir, context_path, gamestate_path, gamestate_log_path
+            )
+    handler_class = type(
+        "OverlayHandler",
+        (OverlayHandler,),
+        {
+            "state_path": state_path,
+            "static_dir": static_dir,
+            "context_path": context_path,
+            "gamestate_path": gamestate_path,
+            "gamestate_log_path": gamestate_log_path,
+            "static_assets": load_static_assets(static_dir),
+        },
+    )
+    httpd = ThreadingHTTPServer((host, port), handler_class)
+    httpd.daemon_threads = True
+    httpd.block_on_close = False
+    return httpd
 
 
 def main() -> None:
@@ -160,6 +463,7 @@ def main() -> None:
     parser.add_argument("--gamestate-log", default="overlay/gamestate.log", help="Path to gamestate log file.")
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind.")
     parser.add_argument("--port", type=int, default=5005, help="Port to bind.")
+    parser.add_argument("--stdlib", action="store_true", help="Use http.server even if aiohttp is installed.")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -169,19 +473,16 @@ def main() -> None:
     context_path = Path(args.context)
     gamestate_path = Path(args.gamestate)
     gamestate_log_path = Path(args.gamestate_log)
-    handler_class = type(
-        "OverlayHandler",
-        (OverlayHandler,),
-        {
-            "state_path": state_path,
-            "static_dir": static_dir,
-            "context_path": context_path,
-            "gamestate_path": gamestate_path,
-            "gamestate_log_path": gamestate_log_path,
-        },
+    httpd = _build_server(
+        args.host,
+        args.port,
+        state_path,
+        static_dir,
+        context_path,
+        gamestate_path,
+        gamestate_log_path,
+        prefer_aiohttp=not args.stdlib,
     )
-
-    httpd = HTTPServer((args.host, args.port), handler_class)
     logger.info("Serving overlay at http://%s:%s", args.host, args.port)
     logger.info("State file: %s", state_path.resolve())
     try:
@@ -189,15 +490,20 @@ def main() -> None:
     except KeyboardInterrupt:
         logger.info("Shutting down overlay server.")
         httpd.server_close()
+    finally:
+        flush_logs()
 
 
 if __name__ == "__main__":
     main()
 
 
-def start_overlay_server(state_path: str | Path, host: str = "127.0.0.1", port: int = 5005) -> HTTPServer:
+def start_overlay_server(
+    state_path: str | Path, host: str = "127.0.0.1", port: int = 5005, prefer_aiohttp: bool = True
+):
     """
-    Start the overlay server in a background thread. Returns the server instance.
+    Start the overlay server in a background thread. Returns the server instance
+    (an AioOverlayServer when aiohttp is used, else a ThreadingHTTPServer).
     """
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
     state_path = Path(state_path)
@@ -205,19 +511,20 @@ def start_overlay_server(state_path: str | Path, host: str = "127.0.0.1", port:
     context_path = state_path.parent / "context.json"
     gamestate_path = state_path.parent / "gamestate.json"
     gamestate_log_path = state_path.parent / "gamestate.log"
-    handler_class = type(
-        "OverlayHandler",
-        (OverlayHandler,),
-        {
-            "state_path": state_path,
-            "static_dir": static_dir,
-            "context_path": context_path,
-            "gamestate_path": gamestate_path,
-            "gamestate_log_path": gamestate_log_path,
-        },
+    httpd = _build_server(
+        host,
+        port,
+        state_path,
+        static_dir,
+        context_path,
+        gamestate_path,
+        gamestate_log_path,
+        prefer_aiohttp=prefer_aiohttp,
     )
-    httpd = HTTPServer((host, port), handler_class)
-    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
-    thread.start()
+    if hasattr(httpd, "start"):
+        httpd.start()
+    else:
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
     logger.info("Overlay server started at http://%s:%s (state=%s)", host, port, state_path.resolve())
     return httpd
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import json
 import time
 from pathlib import Path
 from typing import Literal, Optional
 
+from config import write_json_atomic
+
 OverlayMode = Literal["speak", "think", "clear"]
 
 
@@ -23,10 +24,7 @@ def write_state(
         "font_size": font_size,
         "ts": time.time(),
     }
-    out_path = Path(path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
-    return out_path
+    return write_json_atomic(path, payload)
 
 
 def clear_state(path: str | Path) -> Path:
@@ -0,0 +1,150 @@
+"""
+File change notifications for the overlay files.
+Uses watchdog (inotify / ReadDirectoryChangesW / FSEvents) when installed,
+otherwise falls back to cheap stat polling.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    from watchdog.events import FileSystemEventHandler  # type: ignore
+    from watchdog.observers import Observer  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    FileSystemEventHandler = object  # type: ignore
+    Observer = None  # type: ignore
+
+DEFAULT_POLL_INTERVAL = 0.1
+
+
+class _PathHandler(FileSystemEventHandler):  # type: ignore[misc]
+    def __init__(self, notifier: "FileChangeNotifier"):
+        self.notifier = notifier
+
+    def on_any_event(self, event) -> None:
+        for attr in ("src_path", "dest_path"):
+            candidate = getattr(event, attr, None)
+            if candidate and os.path.normcase(os.path.abspath(candidate)) == self.notifier._target:
+                self.notifier._bump()
+                return
+
+
+class FileChangeNotifier:
+    """
+    Track a change counter for one file. wait() blocks until the counter moves past
+    the version a caller last saw, so several waiters can share one notifier.
+    """
+
+    def __init__(self, path: str | Path, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._target = os.path.normcase(os.path.abspath(self.path))
+        self._cond = threading.Condition()
+        self._version = 0
+        self._listeners: List[Callable[[], None]] = []
+        self._signature = self._stat_signature()
+        self._observer = None
+        if Observer is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                observer = Observer()
+                observer.schedule(_PathHandler(self), str(self.path.parent), recursive=False)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+            except Exception as exc:  # pragma: no cover - platform dependent
+                logger.debug("watchdog unavailable for %s (%s); polling instead.", self.path, exc)
+
+    @property
+    def version(self) -> int:
+        with self._cond:
+            return self._version
+
+    @property
+    def event_driven(self) -> bool:
+        """
+        True when a watchdog observer pushes changes; otherwise callers must poll().
+        """
+        return self._observer is not None
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """
+        Call callback (from the observer thread) on every change. Only event-driven
+        notifiers call listeners; with polling, changes are found by poll().
+        """
+        with self._cond:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]) -> None:
+        with self._cond:
+            try:
+                self._listeners.remove(callback)
+            except ValueError:
+                pass
+
+    def wait(self, since: int, timeout: Optional[float] = None) -> int:
+        """
+        Block until the file changes after version `since` or the timeout passes.
+        Returns the current version (equal to `since` on timeout).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self._observer is not None:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._version != since,
+                    None if deadline is None else max(0.0, deadline - time.monotonic()),
+                )
+                return self._version
+
+        while True:
+            version = self.poll()
+            if version != since:
+                return version
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return since
+            time.sleep(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+
+    def poll(self) -> int:
+        """
+        Non-blocking check: return the current version, stat-ing the file first when
+        there is no watchdog observer. Lets event-loop code wait with asyncio.sleep().
+        """
+        if self._observer is not None:
+            return self.version
+        signature = self._stat_signature()
+        with self._cond:
+            if signature != self._signature:
+                self._signature = signature
+                self._version += 1
+            return self._version
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def _bump(self) -> None:
+        with self._cond:
+            self._version += 1
+            self._cond.notify_all()
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback()
+            except Exception as exc:  # never let a listener kill the observer thread
+                logger.debug("File change listener failed: %s", exc)
+
+    def _stat_signature(self) -> Tuple[int, int]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return (-1, -1)
+        return (st.st_mtime_ns, st.st_size)
@@ -0,0 +1,102 @@
+"""
+Background writer that coalesces overlay state changes.
+Callers set the desired state without blocking; a daemon thread writes only the latest one.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .state import OverlayMode, write_state
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RATE_HZ = 60
+
+
+class OverlayWriter:
+    def __init__(self, path: str | Path, max_rate_hz: float = DEFAULT_MAX_RATE_HZ):
+        self.path = Path(path)
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz > 0 else 0.0
+        # Holds only the most recent desired state; older ones are dropped unwritten.
+        self._pending: queue.Queue[Tuple[OverlayMode, str, int]] = queue.Queue(maxsize=1)
+        self._put_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # Bumped on every state change so a delayed clear can tell it was superseded.
+        self._generation = 0
+        self._clear_timer: Optional[threading.Timer] = None
+
+    def set(self, mode: OverlayMode, text: str = "", font_size: int = 30) -> None:
+        """
+        Replace the pending overlay state. Never blocks on disk I/O.
+        Cancels any delayed clear that has not fired yet.
+        """
+        with self._put_lock:
+            self._generation += 1
+            if self._clear_timer is not None:
+                self._clear_timer.cancel()
+                self._clear_timer = None
+            self._replace_locked((mode, text, font_size))
+
+    def clear(self, delay: float = 0.0) -> None:
+        """
+        Clear the overlay, optionally after `delay` seconds without blocking the caller.
+        A later set() within the delay wins and the clear is dropped.
+        """
+        if delay <= 0:
+            self.set("clear")
+            return
+        with self._put_lock:
+            self._generation += 1
+            if self._clear_timer is not None:
+                self._clear_timer.cancel()
+            timer = threading.Timer(delay, self._clear_if_current, args=(self._generation,))
+            timer.daemon = True
+            self._clear_timer = timer
+            timer.start()
+
+    def flush(self) -> None:
+        """
+        Block until the latest state (including a pending delayed clear) has been written.
+        """
+        timer = self._clear_timer
+        if timer is not None:
+            timer.join()
+        self._pending.join()
+
+    def _clear_if_current(self, generation: int) -> None:
+        with self._put_lock:
+            if generation != self._generation:
+                return
+            self._clear_timer = None
+            self._replace_locked(("clear", "", 30))
+
+    def _replace_locked(self, state: Tuple[OverlayMode, str, int]) -> None:
+        try:
+            self._pending.get_nowait()
+            self._pending.task_done()
+        except queue.Empty:
+            pass
+        self._pending.put_nowait(state)
+        self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="overlay-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            mode, text, font_size = self._pending.get()
+            try:
+                write_state(self.path, mode=mode, text=text, font_size=font_size)
+            except Exception as exc:
+                logger.error("Failed to write overlay state: %s", exc)
+            finally:
+                self._pending.task_done()
+            if self.min_interval:
+                time.sleep(self.min_interval)
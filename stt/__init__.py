@@ -3,15 +3,16 @@ Speech-to-text utilities: push-to-talk recording and OpenAI Whisper transcriptio
 """
 from __future__ import annotations
 
-import glob
-import json
+import functools
 import logging
 import os
 import shutil
+import threading
 import uuid
-from io import BytesIO
-from typing import Optional
-from urllib import error, request
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import json_loads
+from net import ConnectionPool, HTTPStatusError
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +22,24 @@ except Exception as exc:  # pragma: no cover - optional dependency
     logger.debug("listen module unavailable: %s", exc)
     record_push_to_talk = None  # type: ignore
 
-OPENAI_WHISPER_URL = "https://api.openai.com/v1/audio/transcriptions"
+OPENAI_BASE_URL = "https://api.openai.com"
+OPENAI_TRANSCRIPTIONS_PATH = "/v1/audio/transcriptions"
 DEFAULT_WHISPER_MODEL = "whisper-1"
 DEFAULT_LOCAL_WHISPER_MODEL = "base"
+# How many directory levels below C:\ffmpeg / Program Files to scan for ffmpeg.exe.
+FFMPEG_SEARCH_DEPTH = 3
+
+# Loaded local Whisper models by (name, device); loading weights dominates per-call latency.
+# Entries are never evicted, so their GPU/CPU memory stays allocated until process exit.
+_WHISPER: Dict[Tuple[str, str], Any] = {}
+_WHISPER_LOCK = threading.Lock()
+
+# One random boundary per process lets the multipart framing be encoded once and reused.
+_MULTIPART_BOUNDARY = uuid.uuid4().hex
+_MULTIPART_CONTENT_TYPE = f"multipart/form-data; boundary={_MULTIPART_BOUNDARY}"
+
+# Keep-alive pool so back-to-back utterances skip the TCP + TLS handshake.
+_WHISPER_POOL = ConnectionPool(OPENAI_BASE_URL, maxsize=4, timeout=120.0)
 
 
 def transcribe_audio_bytes(
@@ -34,36 +50,52 @@ def transcribe_audio_bytes(
 ) -> str:
     """
     Send audio bytes to OpenAI Whisper API and return the text transcription.
-    Uses urllib to avoid extra dependencies.
+    Uses the stdlib keep-alive pool to avoid extra dependencies.
     """
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY is required for transcription.")
     if not audio_bytes:
         return ""
 
-    boundary = uuid.uuid4().hex
-    body = _build_multipart_body(audio_bytes, boundary, model or DEFAULT_WHISPER_MODEL, language)
+    body = _build_multipart_body(audio_bytes, model or DEFAULT_WHISPER_MODEL, language)
+    return _post_transcription(body, sum(map(len, body)), api_key)
+
+
+def transcribe_audio_file_stream(
+    path: str,
+    api_key: str,
+    model: str | None = None,
+    language: Optional[str] = None,
+) -> str:
+    """
+    Like transcribe_audio_bytes, but the audio is streamed from the open file to the
+    socket, so memory use stays constant however long the recording is.
+    """
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY is required for transcription.")
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return ""
+        body = _FileMultipartBody(f, *_multipart_framing(model or DEFAULT_WHISPER_MODEL, language))
+        return _post_transcription(body, len(body.head) + size + len(body.tail), api_key)
+
+
+def _post_transcription(body: Iterable[Any], length: int, api_key: str) -> str:
     headers = {
         "Authorization": f"Bearer {api_key}",
-        "Content-Type": f"multipart/form-data; boundary={boundary}",
+        "Content-Type": _MULTIPART_CONTENT_TYPE,
+        # Set explicitly so the chunks are sent as-is rather than chunk-encoded.
+        "Content-Length": str(length),
         "Accept": "application/json",
     }
-
-    req = request.Request(OPENAI_WHISPER_URL, data=body, headers=headers, method="POST")
     try:
-        with request.urlopen(req, timeout=120) as resp:
-            resp_data = resp.read()
-            parsed = json.loads(resp_data.decode("utf-8"))
-            return parsed.get("text", "")
-    except error.HTTPError as err:
-        body = ""
-        try:
-            body = err.read().decode("utf-8", errors="replace")
-        except Exception:  # pragma: no cover
-            body = "<unreadable error body>"
-        raise RuntimeError(f"OpenAI transcription failed ({err.code}): {body}") from err
-    except error.URLError as err:
+        resp_data = _WHISPER_POOL.post(OPENAI_TRANSCRIPTIONS_PATH, body=body, headers=headers)
+    except HTTPStatusError as err:
+        raise RuntimeError(f"OpenAI transcription failed ({err.status}): {err.text()}") from err
+    except OSError as err:
         raise RuntimeError(f"OpenAI transcription failed: {err}") from err
+    return json_loads(resp_data).get("text", "")
 
 
 def transcribe_auto(
@@ -73,9 +105,11 @@ def transcribe_auto(
     language: Optional[str] = None,
     local_model: Optional[str] = DEFAULT_LOCAL_WHISPER_MODEL,
     prefer_local: bool = False,
+    whisper_model: Any = None,
 ) -> str:
     """
     Try OpenAI Whisper first (if api_key is provided), otherwise fall back to local whisper.
+    Pass a model from load_whisper_model() as whisper_model to skip the cache lookup.
     """
     errors = []
     if api_key and not prefer_local:
@@ -85,7 +119,9 @@ def transcribe_auto(
             errors.append(f"openai: {exc}")
 
     try:
-        return transcribe_local_whisper(audio_bytes, model=local_model, language=language)
+        return transcribe_local_whisper(
+            audio_bytes, model=local_model, language=language, whisper_model=whisper_model
+        )
     except Exception as exc:  # pragma: no cover - optional dependency
         errors.append(f"local: {exc}")
         raise RuntimeError("; ".join(errors)) from exc
@@ -99,37 +135,48 @@ def transcribe_audio_file(
 ) -> str:
     if not os.path.exists(path):
         raise FileNotFoundError(f"Audio file not found: {path}")
-    with open(path, "rb") as f:
-        data = f.read()
-    return transcribe_audio_bytes(data, api_key=api_key, model=model, language=language)
+    return transcribe_audio_file_stream(path, api_key=api_key, model=model, language=language)
+
+
+def load_whisper_model(model: Optional[str] = DEFAULT_LOCAL_WHISPER_MODEL, device: Optional[str] = None) -> Any:
+    """
+    Load a local Whisper model once per (model, device) and return the cached instance
+    on later calls. device defaults to cuda when available, else cpu.
+    Requires: pip install openai-whisper.
+    """
+    chosen_model = model or DEFAULT_LOCAL_WHISPER_MODEL
+    device = device or _whisper_device()
+    key = (chosen_model, device)
+    with _WHISPER_LOCK:
+        cached = _WHISPER.get(key)
+        if cached is not None:
+            return cached
+        try:
+            import whisper  # type: ignore
+        except ImportError as exc:  # pragma: no cover - optional dep
+            raise RuntimeError("Local Whisper requires 'pip install openai-whisper' and ffmpeg on PATH.") from exc
+
+        logger.info("Loading local Whisper model=%s device=%s", chosen_model, device)
+        wmodel = whisper.load_model(chosen_model, device=device)
+        _WHISPER[key] = wmodel
+        return wmodel
 
 
 def transcribe_local_whisper(
     audio_bytes: bytes,
     model: Optional[str] = DEFAULT_LOCAL_WHISPER_MODEL,
     language: Optional[str] = None,
+    whisper_model: Any = None,
 ) -> str:
     """
     Local transcription using the openai/whisper package (CPU/GPU).
     Requires: pip install openai-whisper && ffmpeg on PATH.
     """
-    try:
-        import whisper  # type: ignore
-    except ImportError as exc:  # pragma: no cover - optional dep
-        raise RuntimeError("Local Whisper requires 'pip install openai-whisper' and ffmpeg on PATH.") from exc
-
-    try:
-        import torch  # type: ignore
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-    except Exception:
-        device = "cpu"
-
-    chosen_model = model or DEFAULT_LOCAL_WHISPER_MODEL
-    logger.info("Transcribing locally with Whisper model=%s device=%s", chosen_model, device)
+    wmodel = whisper_model if whisper_model is not None else load_whisper_model(model)
+    logger.info("Transcribing locally with Whisper model=%s", model or DEFAULT_LOCAL_WHISPER_MODEL)
     _ensure_ffmpeg_on_path()
     audio_path = _bytes_to_temp_wav(audio_bytes)
     try:
-        wmodel = whisper.load_model(chosen_model, device=device)
         result = wmodel.transcribe(audio_path, language=language)
         return result.get("text", "")
     finally:
@@ -139,36 +186,72 @@ def transcribe_local_whisper(
             pass
 
 
-def _build_multipart_body(audio_bytes: bytes, boundary: str, model: str, language: Optional[str]) -> bytes:
+@functools.cache
+def _whisper_device() -> str:
+    try:
+        import torch  # type: ignore
+
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except Exception:
+        return "cpu"
+
+
+def _build_multipart_body(audio_bytes: bytes, model: str, language: Optional[str]) -> List[bytes]:
     """
-    Build a multipart/form-data payload for Whisper transcription.
+    Build a multipart/form-data payload for Whisper transcription as a list of chunks.
+    The audio is referenced, not copied; http.client sends the chunks one after another.
     """
-    buffer = BytesIO()
-    sep = f"--{boundary}\r\n".encode("utf-8")
+    head, tail = _multipart_framing(model, language)
+    return [head, audio_bytes, tail]
 
-    # file part
-    buffer.write(sep)
-    buffer.write(
-        b'Content-Disposition: form-data; name="file"; filename="audio.wav"\r\n'
-    )
-    buffer.write(b"Content-Type: audio/wav\r\n\r\n")
-    buffer.write(audio_bytes)
-    buffer.write(b"\r\n")
 
-    # model part
-    buffer.write(sep)
-    buffer.write(b'Content-Disposition: form-data; name="model"\r\n\r\n')
-    buffer.write(model.encode("utf-8"))
-    buffer.write(b"\r\n")
+@functools.lru_cache(maxsize=16)
+def _multipart_framing(model: str, language: Optional[str]) -> Tuple[bytes, bytes]:
+    """
+    Encode the multipart bytes before and after the audio once per (model, language).
+    """
+    sep = f"--{_MULTIPART_BOUNDARY}\r\n".encode("utf-8")
+    head = (
+        sep
+        + b'Content-Disposition: form-data; name="file"; filename="audio.wav"\r\n'
+        + b"Content-Type: audio/wav\r\n\r\n"
+    )
 
+    # end of file part, then model (and language) fields
+    tail = [
+        b"\r\n",
+        sep,
+        b'Content-Disposition: form-data; name="model"\r\n\r\n',
+        model.encode("utf-8"),
+        b"\r\n",
+    ]
     if language:
-        buffer.write(sep)
-        buffer.write(b'Content-Disposition: form-data; name="language"\r\n\r\n')
-        buffer.write(language.encode("utf-8"))
-        buffer.write(b"\r\n")
+        tail += [
+            sep,
+            b'Content-Disposition: form-data; name="language"\r\n\r\n',
+            language.encode("utf-8"),
+            b"\r\n",
+        ]
+    tail.append(f"--{_MULTIPART_BOUNDARY}--\r\n".encode("utf-8"))
+    return head, b"".join(tail)
+
+
+class _FileMultipartBody:
+    """
+    Multipart body of [head, file, tail]. http.client reads the file object in blocks
+    as it sends. Each iteration rewinds the file, so a retried request resends it whole.
+    """
 
-    buffer.write(f"--{boundary}--\r\n".encode("utf-8"))
-    return buffer.getvalue()
+    def __init__(self, f: BinaryIO, head: bytes, tail: bytes):
+        self.f = f
+        self.head = head
+        self.tail = tail
+
+    def __iter__(self) -> Iterator[Any]:
+        self.f.seek(0)
+        yield self.head
+        yield self.f
+        yield self.tail
 
 
 def _bytes_to_temp_wav(data: bytes) -> str:
@@ -187,20 +270,46 @@ def _ensure_ffmpeg_on_path() -> None:
     if shutil.which("ffmpeg"):
         return
 
-    candidates = []
-    for root in (
-        r"C:\ffmpeg",
-        os.getenv("ProgramFiles"),
-        os.getenv("ProgramFiles(x86)"),
-    ):
-        if not root:
-            continue
-        candidates.extend(glob.glob(os.path.join(root, "**", "ffmpeg.exe"), recursive=True))
-
-    if not candidates:
+    ffmpeg_dir = _find_ffmpeg_dir()
+    if ffmpeg_dir is None:
         raise RuntimeError("ffmpeg not found on PATH. Install ffmpeg and ensure ffmpeg.exe is reachable.")
 
-    ffmpeg_path = candidates[0]
-    ffmpeg_dir = os.path.dirname(ffmpeg_path)
     os.environ["PATH"] = ffmpeg_dir + os.pathsep + os.environ.get("PATH", "")
     logger.info("Added ffmpeg to PATH from %s", ffmpeg_dir)
+
+
+@functools.cache
+def _find_ffmpeg_dir() -> Optional[str]:
+    # Cached hit or miss: the directory scan runs at most once per process.
+    roots = [r for r in (r"C:\ffmpeg", os.getenv("ProgramFiles"), os.getenv("ProgramFiles(x86)")) if r]
+    for root in roots:
+        for sub in (("bin",), ("ffmpeg", "bin"), ()):
+            candidate = os.path.join(root, *sub, "ffmpeg.exe")
+            if os.path.isfile(candidate):
+                return os.path.dirname(candidate)
+    for root in roots:
+        found = _scan_for_file(root, "ffmpeg.exe", FFMPEG_SEARCH_DEPTH)
+        if found:
+            return os.path.dirname(found)
+    return None
+
+
+def _scan_for_file(root: str, name: str, depth: int) -> Optional[str]:
+    """
+    Breadth-first search for `name` at most `depth` directory levels below root.
+    """
+    level = [root]
+    for _ in range(depth + 1):
+        subdirs = []
+        for directory in level:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.lower() == name:
+                            return entry.path
+            except OSError:
+                continue
+        level = subdirs
+    return None
@@ -5,13 +5,18 @@ Requires optional dependencies: sounddevice, keyboard, numpy.
 from __future__ import annotations
 
 import logging
-import queue
-from io import BytesIO
-from typing import Optional
-import wave
+import struct
+import threading
+import time
+from typing import Callable, Optional
 
 logger = logging.getLogger(__name__)
 
+# Buffer size (and growth step) in seconds when max_duration_sec is None.
+UNBOUNDED_BUFFER_SEC = 30
+# How often the recording loop checks whether the hotkey is still held.
+PTT_POLL_INTERVAL = 0.01
+
 
 def _require_modules():
     try:
@@ -32,55 +37,88 @@ def record_push_to_talk(
     channels: int = 1,
     dtype: str = "int16",
     max_duration_sec: Optional[int] = 30,
+    on_start: Optional[Callable[[], None]] = None,
 ) -> bytes:
     """
     Hold the hotkey to record; releasing stops recording.
+    on_start is called as soon as the hotkey goes down (e.g. to interrupt playback).
     Returns WAV bytes.
     """
     sounddevice, keyboard, numpy = _require_modules()
 
     logger.info("Hold %s to record, release to stop. Ctrl+C to exit.", hotkey)
     keyboard.wait(hotkey)
+    if on_start is not None:
+        on_start()
     logger.info("Recording…")
-    q: queue.Queue = queue.Queue()
 
-    def callback(indata, frames, time, status):
+    # The audio callback copies each block straight into one preallocated buffer;
+    # the main thread only watches the hotkey (and grows the buffer when unbounded).
+    step = sample_rate * UNBOUNDED_BUFFER_SEC
+    buf = numpy.empty((sample_rate * max_duration_sec if max_duration_sec else step, channels), dtype=dtype)
+    write_idx = 0
+    lock = threading.Lock()
+    full = threading.Event()
+
+    def callback(indata, frames, time_info, status):
+        nonlocal write_idx
         if status:
             logger.debug("Sounddevice status: %s", status)
-        q.put(indata.copy())
+        with lock:
+            n = min(len(indata), len(buf) - write_idx)
+            buf[write_idx : write_idx + n] = indata[:n]
+            write_idx += n
+            if write_idx == len(buf):
+                full.set()
 
-    frames = []
     with sounddevice.InputStream(
         samplerate=sample_rate, channels=channels, dtype=dtype, callback=callback
     ):
-        elapsed_frames = 0
-        while keyboard.is_pressed(hotkey):
-            try:
-                data = q.get(timeout=0.1)
-                frames.append(data)
-                elapsed_frames += len(data)
-                if max_duration_sec and elapsed_frames / sample_rate >= max_duration_sec:
-                    logger.info("Max recording duration reached; stopping.")
-                    break
-            except queue.Empty:
-                continue
-
-    if not frames:
+        while keyboard.is_pressed(hotkey) and not full.is_set():
+            if not max_duration_sec and len(buf) - write_idx < step // 2:
+                with lock:
+                    buf = _grow(numpy, buf, write_idx, step)
+            time.sleep(PTT_POLL_INTERVAL)
+
+    if full.is_set():
+        logger.info("Max recording duration reached; stopping." if max_duration_sec else "Recording buffer full; stopping.")
+
+    if not write_idx:
         logger.info("No audio captured.")
         return b""
 
-    audio = numpy.concatenate(frames, axis=0)
-    return _to_wav_bytes(audio, sample_rate, channels, dtype)
+    return _to_wav_bytes(buf[:write_idx], sample_rate, channels, dtype)
+
+
+def _grow(numpy, buf, used: int, step: int):
+    grown = numpy.empty((len(buf) + step, buf.shape[1]), dtype=buf.dtype)
+    grown[:used] = buf[:used]
+    return grown
 
 
 def _to_wav_bytes(audio, sample_rate: int, channels: int, dtype: str) -> bytes:
-    bio = BytesIO()
-    with wave.open(bio, "wb") as wf:
-        wf.setnchannels(channels)
-        wf.setsampwidth(_dtype_width(dtype))
-        wf.setframerate(sample_rate)
-        wf.writeframes(audio.tobytes())
-    return bio.getvalue()
+    """
+    Prefix the PCM samples with a 44-byte RIFF/WAVE header; the length is known up front.
+    """
+    width = _dtype_width(dtype)
+    pcm = audio.tobytes()
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + len(pcm),
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        channels,
+        sample_rate,
+        sample_rate * channels * width,
+        channels * width,
+        width * 8,
+        b"data",
+        len(pcm),
+    )
+    return header + pcm
 
 
 def _dtype_width(dtype: str) -> int:
@@ -4,15 +4,20 @@ Text-to-speech interfaces powered by ElevenLabs.
 from __future__ import annotations
 
 import logging
-from typing import Iterable, Optional
+import threading
+from concurrent.futures import Future
+from typing import Dict, Iterable, Optional, Tuple
 
-from config import load_settings
+from config import Settings, load_settings
+from .audio_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, AudioCache
 from .elevenlabs import (
     DEFAULT_MODEL,
     ElevenLabsClient,
     ElevenLabsConfig,
     play_audio_bytes,
     play_audio_stream,
+    play_speech_stream,
+    split_sentences,
 )
 
 logger = logging.getLogger(__name__)
@@ -23,36 +28,74 @@ DEFAULT_SIMILARITY = 0.7
 DEFAULT_SPEED = 0.9  # Slightly quicker than minimum
 DEFAULT_PLAYBACK_VOLUME = 0.6  # Default lower volume for playback
 
+# (client, playback volume) per requested voice_id, valid for the settings object they were built from.
+_CLIENTS: Dict[Optional[str], Tuple[ElevenLabsClient, float]] = {}
+_CLIENTS_SETTINGS: Optional[Settings] = None
+_CLIENTS_LOCK = threading.Lock()
+
 
 def speak(text: str, *, voice_id: Optional[str] = None, play: bool = True) -> bytes:
     """
     Synthesize speech using the non-streaming endpoint. Returns audio bytes.
+    Multi-sentence text is synthesized per sentence in parallel and starts playing
+    once the first sentence is ready.
     """
-    settings = load_settings()
-    client = _build_client(settings, voice_id)
-    volume = _resolve_playback_volume(settings)
+    client, volume = _get_client(voice_id)
+    if play and len(split_sentences(text)) > 1:
+        clips: list[bytes] = []
+
+        def collect() -> Iterable[bytes]:
+            for clip in client.iter_sentence_audio(text):
+                clips.append(clip)
+                yield clip
+
+        play_audio_stream(collect(), volume=volume, low_latency=client.config.low_latency_playback)
+        return b"".join(clips)
     audio = client.speak_to_bytes(text)
     if play:
-        play_audio_bytes(audio, description="tts", volume=volume)
+        play_audio_bytes(audio, description="tts", volume=volume, low_latency=client.config.low_latency_playback)
     return audio
 
 
 def stream_speech(text: str, *, voice_id: Optional[str] = None, play: bool = True) -> Optional[Iterable[bytes]]:
     """
-    Stream speech; when play=True audio is played as it arrives, otherwise chunks are returned.
+    Stream speech; when play=True audio is piped into the player as it arrives,
+    otherwise chunks are returned.
     """
-    settings = load_settings()
-    client = _build_client(settings, voice_id)
-    volume = _resolve_playback_volume(settings)
-    chunks = client.stream_audio_chunks(text)
+    client, volume = _get_client(voice_id)
     if play:
-        play_audio_stream(chunks, volume=volume)
+        play_speech_stream(client, text, volume=volume, low_latency=client.config.low_latency_playback)
         return None
-    return chunks
+    return client.stream_audio_chunks(text)
+
+
+def prefetch_speech(text: str, *, voice_id: Optional[str] = None) -> "Future[bytes]":
+    """
+    Start synthesizing text in the background; a later speak()/stream_speech() of the
+    same text with the same voice plays the prefetched audio instead of waiting on the API.
+    """
+    client, _ = _get_client(voice_id)
+    return client.prefetch(text)
 
 
-def _build_client(settings=None, voice_id: Optional[str] = None) -> ElevenLabsClient:
-    settings = settings or load_settings()
+def _get_client(voice_id: Optional[str]) -> Tuple[ElevenLabsClient, float]:
+    """
+    Return the client and playback volume for voice_id, building them once per settings object.
+    """
+    global _CLIENTS_SETTINGS
+    settings = load_settings()
+    with _CLIENTS_LOCK:
+        if settings is not _CLIENTS_SETTINGS:
+            # load_settings.cache_clear() was called; rebuild from the new values.
+            _CLIENTS.clear()
+            _CLIENTS_SETTINGS = settings
+        entry = _CLIENTS.get(voice_id)
+        if entry is None:
+            entry = _CLIENTS[voice_id] = (_build_client(settings, voice_id), _resolve_playback_volume(settings))
+        return entry
+
+
+def _build_client(settings: Settings, voice_id: Optional[str] = None) -> ElevenLabsClient:
     if not settings.elevenlabs_api_key:
         raise RuntimeError("ELEVENLABS_API_KEY is required. Set it in your .env.")
 
@@ -88,7 +131,18 @@ def _build_client(settings=None, voice_id: Optional[str] = None) -> ElevenLabsCl
         config.similarity_boost,
         config.speed,
     )
-    return ElevenLabsClient(config)
+    return ElevenLabsClient(config, cache=_build_audio_cache(settings))
+
+
+def _build_audio_cache(settings: Settings) -> Optional[AudioCache]:
+    """
+    Disk cache for synthesized audio; TTS_CACHE_MAX_MB=0 turns it off.
+    """
+    max_mb = settings.tts_cache_max_mb
+    max_bytes = DEFAULT_MAX_BYTES if max_mb is None else int(max_mb * 1024 * 1024)
+    if max_bytes <= 0:
+        return None
+    return AudioCache(settings.tts_cache_dir or DEFAULT_CACHE_DIR, max_bytes=max_bytes)
 
 
 def _resolve_playback_volume(settings) -> float:
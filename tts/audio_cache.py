@@ -0,0 +1,179 @@
+"""
+On-disk cache of synthesized audio, keyed by a hash of everything that shapes the sound
+(voice, model, voice settings, output format, text). Repeated phrases skip the API call.
+Least-recently-used files are evicted once the directory grows past max_bytes.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "leviathan_tts"
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+CACHE_SUFFIX = ".mp3"
+
+
+def cache_key(voice_id: str, payload: Any) -> str:
+    """
+    Stable 128-bit key for a synthesis request; payload is the JSON body sent to the API.
+    """
+    raw = json.dumps([voice_id, payload], sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+class AudioCache:
+    """
+    Content-addressed mp3 files in one directory. Hits bump the file's mtime, which is
+    what eviction orders by (atime is often disabled).
+    """
+
+    def __init__(self, directory: str | Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._sweep_lock = threading.Lock()
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}{CACHE_SUFFIX}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path_for(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        self._touch(path)
+        return data
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """
+        Open a cached file for reading, or return None on a miss.
+        """
+        path = self.path_for(key)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        self._touch(path)
+        return f
+
+    def iter_chunks(self, key: str, chunk_size: int) -> Optional[Iterator[bytes]]:
+        """
+        Return an iterator over a cached file's bytes, or None on a miss.
+        """
+        f = self.open(key)
+        return None if f is None else _read_chunks(f, chunk_size)
+
+    def put(self, key: str, data: bytes) -> None:
+        if not data:
+            return
+        with self.writer(key) as write:
+            write(data)
+
+    def writer(self, key: str) -> "_CacheWriter":
+        """
+        Context manager yielding a write(bytes) callable. The file only appears under its
+        key if the block exits cleanly, so an interrupted stream never poisons the cache.
+        Disk errors are logged and turn the writer into a no-op; they never reach the caller.
+        """
+        return _CacheWriter(self, key)
+
+    def sweep(self) -> None:
+        """
+        Delete the least recently used files until the directory fits in max_bytes.
+        """
+        with self._sweep_lock:
+            try:
+                entries = [e for e in os.scandir(self.directory) if e.name.endswith(CACHE_SUFFIX)]
+            except OSError:
+                return
+            files = []
+            total = 0
+            for entry in entries:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+            if total <= self.max_bytes:
+                return
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    continue
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+
+class _CacheWriter:
+    def __init__(self, cache: AudioCache, key: str):
+        self.cache = cache
+        self.key = key
+        self._file = None
+        self._tmp = ""
+        self._failed = False
+
+    def __enter__(self):
+        try:
+            self.cache.directory.mkdir(parents=True, exist_ok=True)
+            fd, self._tmp = tempfile.mkstemp(dir=self.cache.directory, suffix=".partial")
+            self._file = os.fdopen(fd, "wb")
+        except OSError as exc:
+            self._fail(exc)
+        return self.write
+
+    def write(self, data: bytes) -> None:
+        if self._failed:
+            return
+        try:
+            self._file.write(data)
+        except OSError as exc:
+            self._fail(exc)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._file is not None:
+            self._file.close()
+        if exc_type is None and not self._failed:
+            try:
+                os.replace(self._tmp, self.cache.path_for(self.key))
+                self.cache.sweep()
+                return
+            except OSError as err:
+                self._fail(err)
+        if self._tmp:
+            try:
+                os.remove(self._tmp)
+            except OSError:
+                pass
+
+    def _fail(self, exc: OSError) -> None:
+        if not self._failed:
+            logger.debug("Not caching audio %s: %s", self.key, exc)
+        self._failed = True
+
+
+def _read_chunks(f, chunk_size: int) -> Iterator[bytes]:
+    with f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
@@ -1,29 +1,74 @@
 """
 Minimal ElevenLabs client for speech synthesis.
-Uses urllib to avoid external dependencies and ffplay (if present) for playback.
+Uses the stdlib keep-alive pool (or HTTP/2 via httpx when installed) and ffplay (if present) for playback.
 """
 from __future__ import annotations
 
-import json
+import ctypes
+import functools
+import io
 import logging
 import os
+import re
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 import time
-import urllib.error
-import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Dict, Iterable, Iterator, Optional
+from http.client import HTTPResponse
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config import json_dumps
+from net import ConnectionPool, HTTPStatusError
+
+from .audio_cache import AudioCache, cache_key
+
+try:
+    import httpx  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None  # type: ignore
 
 logger = logging.getLogger(__name__)
 
 API_BASE = "https://api.elevenlabs.io/v1"
 DEFAULT_MODEL = "eleven_multilingual_v2"
 DEFAULT_OUTPUT_FORMAT = "mp3_44100_128"
-DEFAULT_CHUNK_SIZE = 16 * 1024
+# First streamed read. Small, so the first mp3 frames (~417 bytes each at 128 kbps)
+# reach the player without waiting for a large buffer to fill; later reads use
+# STREAM_TAIL_CHUNK_SIZE for throughput.
+DEFAULT_CHUNK_SIZE = 4 * 1024
+STREAM_TAIL_CHUNK_SIZE = 32 * 1024
+# Largest single write into the player pipe when a response is copied straight through.
+PIPE_BLOCK_SIZE = 64 * 1024
+# Common Windows install locations, checked when ffplay is not on PATH.
+FFPLAY_WINDOWS_CANDIDATES = (
+    r"C:\ffmpeg\ffmpeg-master-latest-win64-gpl\bin\ffplay.exe",
+    r"C:\Program Files\ffmpeg\bin\ffplay.exe",
+)
+# tmpfs mount for fallback temp files on Linux.
+SHM_DIR = "/dev/shm"
+# Background syntheses started by prefetch(): how many run at once, and how many
+# (running or finished) are kept for pickup before the oldest is dropped.
+PREFETCH_WORKERS = 2
+PREFETCH_MAX = 8
+# Encoded request bodies remembered per client, by text.
+PAYLOAD_CACHE_SIZE = 64
+# Keep-alive connections kept per process; one per in-flight synthesis is plenty.
+POOL_MAXSIZE = 8
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+_POOL: Optional[ConnectionPool] = None
+_POOL_PID = 0
+_POOL_LOCK = threading.Lock()
+_HTTP2: Optional["httpx.Client"] = None
+_HTTP2_PID = 0
 
 
 @dataclass
@@ -39,81 +84,373 @@ class ElevenLabsConfig:
     optimize_streaming_latency: int | None = None  # 0-4 where lower is lower latency
     output_format: str = DEFAULT_OUTPUT_FORMAT
     chunk_size: int = DEFAULT_CHUNK_SIZE
-
-    def as_payload(self, text: str) -> Dict[str, object]:
-        payload: Dict[str, object] = {
-            "text": text,
-            "model_id": self.model_id,
-            "voice_settings": {
-                "stability": self.stability,
-                "similarity_boost": self.similarity_boost,
-                "use_speaker_boost": self.use_speaker_boost,
-            },
+    # Start ffplay on the first decoded frame; turn off if the first few ms get clipped.
+    low_latency_playback: bool = True
+
+    def __post_init__(self) -> None:
+        # Everything but the text is fixed per config, so build it once.
+        # "text" stays first so request bodies keep the same key order.
+        voice_settings: Dict[str, object] = {
+            "stability": self.stability,
+            "similarity_boost": self.similarity_boost,
+            "use_speaker_boost": self.use_speaker_boost,
         }
         if self.speed is not None:
-            payload["voice_settings"]["speed"] = self.speed
+            voice_settings["speed"] = self.speed
         if self.style is not None:
-            payload["voice_settings"]["style"] = self.style
+            voice_settings["style"] = self.style
+        template: Dict[str, object] = {
+            "text": "",
+            "model_id": self.model_id,
+            "voice_settings": voice_settings,
+        }
         if self.optimize_streaming_latency is not None:
-            payload["optimize_streaming_latency"] = self.optimize_streaming_latency
+            template["optimize_streaming_latency"] = self.optimize_streaming_latency
         if self.output_format:
-            payload["output_format"] = self.output_format
+            template["output_format"] = self.output_format
+        self._payload_template = template
+
+    def as_payload(self, text: str) -> Dict[str, object]:
+        """
+        Request body for text. Shallow copy of the template: treat nested values as read-only.
+        """
+        payload = self._payload_template.copy()
+        payload["text"] = text
         return payload
 
 
 class ElevenLabsClient:
-    def __init__(self, config: ElevenLabsConfig):
+    def __init__(self, config: ElevenLabsConfig, cache: Optional[AudioCache] = None):
         self.config = config
+        self.cache = cache
+        self._prefetched: "OrderedDict[str, Future[bytes]]" = OrderedDict()
+        self._prefetch_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Nothing here depends on the text, so build it once instead of per request.
+        self._endpoint = f"{urlsplit(API_BASE).path}/text-to-speech/{config.voice_id}"
+        self._stream_endpoint = self._endpoint + "/stream"
+        self._headers = {
+            "Content-Type": "application/json",
+            "Accept": "audio/mpeg",
+            "xi-api-key": config.api_key,
+        }
+        self._prepare = functools.lru_cache(maxsize=PAYLOAD_CACHE_SIZE)(self._prepare)
 
     def speak_to_bytes(self, text: str) -> bytes:
         """
         Synthesize full audio and return bytes (non-streaming endpoint).
+        Uses a matching prefetch() result, or the audio cache, before calling the API.
+        """
+        if not text:
+            return b""
+        key, body = self._prepare(text)
+        prefetched = self._take_prefetched(key)
+        if prefetched is not None:
+            return prefetched
+        return self._synthesize(body, key)
+
+    def prefetch(self, text: str) -> "Future[bytes]":
         """
-        chunks = list(self._iter_request(text, stream=False))
-        return b"".join(chunks)
+        Start synthesizing text in the background and return the Future. A later
+        speak_to_bytes/stream_audio_chunks/pipe_to of the same text uses its result
+        (waiting for it if still running) instead of making a second request.
+        """
+        key, body = self._prepare(text)
+        with self._prefetch_lock:
+            future = self._prefetched.get(key)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=PREFETCH_WORKERS, thread_name_prefix="tts-prefetch"
+                    )
+                future = self._executor.submit(self._synthesize, body, key)
+                self._prefetched[key] = future
+                while len(self._prefetched) > PREFETCH_MAX:
+                    self._prefetched.popitem(last=False)
+            return future
+
+    def iter_sentence_audio(self, text: str) -> Iterator[bytes]:
+        """
+        Synthesize text one sentence at a time and yield each clip in order, keeping the
+        next PREFETCH_WORKERS sentences in flight. First audio waits on one sentence
+        rather than the whole paragraph; the clips share one output format, so they
+        play back to back as a single mp3 stream.
+        """
+        sentences = split_sentences(text)
+        for idx, sentence in enumerate(sentences):
+            for upcoming in sentences[idx + 1 : idx + 1 + PREFETCH_WORKERS]:
+                self.prefetch(upcoming)
+            yield self.speak_to_bytes(sentence)
+
+    def _take_prefetched(self, key: str) -> Optional[bytes]:
+        with self._prefetch_lock:
+            future = self._prefetched.pop(key, None)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as exc:
+            logger.debug("Prefetched synthesis failed (%s); requesting again.", exc)
+            return None
+
+    def _synthesize(self, body: bytes, key: str) -> bytes:
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        # Non-streaming: one read of the whole body, no per-chunk list to join.
+        with self._response(body, stream=False) as resp:
+            audio = resp.read()
+        if self.cache is not None:
+            self.cache.put(key, audio)
+        return audio
 
     def stream_audio_chunks(self, text: str) -> Iterator[bytes]:
         """
         Stream audio chunks as they arrive from the streaming endpoint.
+        With a cache, hits are read from disk and misses are saved once fully received.
         """
-        yield from self._iter_request(text, stream=True)
-
-    def _iter_request(self, text: str, stream: bool) -> Iterator[bytes]:
         if not text:
             return
-        endpoint = f"{API_BASE}/text-to-speech/{self.config.voice_id}"
-        if stream:
-            endpoint += "/stream"
-        payload = json.dumps(self.config.as_payload(text)).encode("utf-8")
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "audio/mpeg",
-            "xi-api-key": self.config.api_key,
-        }
-        req = urllib.request.Request(endpoint, data=payload, headers=headers, method="POST")
+        key, body = self._prepare(text)
+        prefetched = self._take_prefetched(key)
+        if prefetched is not None:
+            yield prefetched
+            return
+        if self.cache is None:
+            yield from self._iter_stream(body)
+            return
+        cached = self.cache.iter_chunks(key, STREAM_TAIL_CHUNK_SIZE)
+        if cached is not None:
+            yield from cached
+            return
+        # Exiting early (GeneratorExit when playback stops) drops the partial file.
+        with self.cache.writer(key) as write:
+            for chunk in self._iter_stream(body):
+                write(chunk)
+                yield chunk
 
+    def pipe_to(self, text: str, sink: BinaryIO, block_size: int = PIPE_BLOCK_SIZE) -> bool:
+        """
+        Stream synthesized audio straight into sink (e.g. ffplay's stdin), writing whatever
+        has arrived, up to block_size at a time, without building per-chunk bytes lists.
+        Cache hits are copied from disk; misses are teed into the cache.
+        Returns False if the sink stopped accepting data before the audio ended.
+        """
+        if not text:
+            return True
+        key, body = self._prepare(text)
         try:
-            with urllib.request.urlopen(req, timeout=60) as resp:
-                if not stream:
-                    yield resp.read()
-                    return
-                while True:
-                    chunk = resp.read(self.config.chunk_size)
-                    if not chunk:
-                        break
-                    yield chunk
-        except urllib.error.HTTPError as err:
-            body = ""
-            try:
-                body = err.read().decode("utf-8", errors="replace")
-            except Exception:  # pragma: no cover - best effort logging
-                body = "<unreadable error body>"
-            raise RuntimeError(f"ElevenLabs request failed ({err.code}): {body}") from err
-        except urllib.error.URLError as err:
+            prefetched = self._take_prefetched(key)
+            if prefetched is not None:
+                _copy_blocks(io.BytesIO(prefetched), sink, block_size)
+                return True
+            if self.cache is None:
+                with self._response(body, stream=True) as resp:
+                    _copy_blocks(resp, sink, block_size)
+                return True
+            cached = self.cache.open(key)
+            if cached is not None:
+                with cached:
+                    _copy_file(cached, sink, block_size)
+                return True
+            with self._response(body, stream=True) as resp, self.cache.writer(key) as tee:
+                _copy_blocks(resp, sink, block_size, tee)
+        except _SinkClosed:
+            return False
+        return True
+
+    def _prepare(self, text: str) -> Tuple[str, bytes]:
+        """
+        Cache key and encoded JSON request body for text. Memoized per client in __init__,
+        so repeated lines (canned prompts, retries, prefetch pickups) encode once.
+        """
+        payload = self.config.as_payload(text)
+        return cache_key(self.config.voice_id, payload), json_dumps(payload)
+
+    def _iter_stream(self, body: bytes) -> Iterator[bytes]:
+        with self._response(body, stream=True) as resp:
+            # Fill one reusable buffer instead of allocating a fresh read buffer per chunk.
+            buf = bytearray(max(self.config.chunk_size, STREAM_TAIL_CHUNK_SIZE))
+            view = memoryview(buf)
+            size = self.config.chunk_size
+            while n := resp.readinto(view[:size]):
+                yield bytes(view[:n])
+                size = len(buf)
+
+    @contextmanager
+    def _response(self, body: bytes, stream: bool) -> Iterator[HTTPResponse]:
+        endpoint = self._stream_endpoint if stream else self._endpoint
+        http2 = _get_http2_client()
+        if http2 is not None:
+            with _http2_response(http2, endpoint, body, self._headers) as resp:
+                yield resp
+            return
+        try:
+            # The pool copies headers before adding its own, so the shared dict is safe.
+            with _get_pool().request("POST", endpoint, body=body, headers=self._headers) as resp:
+                yield resp
+        except HTTPStatusError as err:
+            raise RuntimeError(f"ElevenLabs request failed ({err.status}): {err.text()}") from err
+        except OSError as err:
             raise RuntimeError(f"ElevenLabs request failed: {err}") from err
 
 
-def play_audio_bytes(data: bytes, description: str | None = None, volume: float | None = None) -> None:
+def split_sentences(text: str) -> list[str]:
+    """
+    Split text after ., ! or ? followed by whitespace; blank pieces are dropped.
+    """
+    return [part for part in _SENTENCE_BREAK.split(text.strip()) if part]
+
+
+class _SinkClosed(Exception):
+    """
+    The audio sink stopped accepting data (e.g. ffplay exited). Not an OSError, so it is
+    never mistaken for a failed API request.
+    """
+
+
+def _copy_blocks(
+    src: BinaryIO, sink: BinaryIO, block_size: int, tee: Optional[Callable[[bytes], None]] = None
+) -> None:
+    # read1() returns what is already buffered instead of waiting for a full block.
+    read = getattr(src, "read1", src.read)
+    while True:
+        block = read(block_size)
+        if not block:
+            return
+        if tee is not None:
+            tee(block)
+        try:
+            sink.write(block)
+            sink.flush()
+        except OSError as exc:
+            raise _SinkClosed() from exc
+
+
+class _StreamReader:
+    """
+    read/read1/readinto over an httpx streaming response, so the copy loops treat it
+    like an http.client response.
+    """
+
+    def __init__(self, resp: "httpx.Response"):
+        self._chunks = resp.iter_bytes()
+        self._pending = b""
+
+    def read(self, size: int = -1) -> bytes:
+        if size >= 0:
+            return self.read1(size)
+        data = self._pending + b"".join(self._chunks)
+        self._pending = b""
+        return data
+
+    def read1(self, size: int = -1) -> bytes:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return b""
+            self._pending = chunk
+        if size < 0 or size >= len(self._pending):
+            block, self._pending = self._pending, b""
+        else:
+            block, self._pending = self._pending[:size], self._pending[size:]
+        return block
+
+    def readinto(self, buf: bytearray) -> int:
+        block = self.read1(len(buf))
+        buf[: len(block)] = block
+        return len(block)
+
+
+@contextmanager
+def _http2_response(
+    client: "httpx.Client", endpoint: str, body: bytes, headers: Dict[str, str]
+) -> Iterator[_StreamReader]:
+    try:
+        with client.stream("POST", endpoint, content=body, headers=headers) as resp:
+            if resp.status_code >= 400:
+                detail = resp.read().decode("utf-8", errors="replace")
+                raise RuntimeError(f"ElevenLabs request failed ({resp.status_code}): {detail}")
+            yield _StreamReader(resp)
+    except httpx.HTTPError as err:
+        raise RuntimeError(f"ElevenLabs request failed: {err}") from err
+
+
+def _copy_file(src: BinaryIO, sink: BinaryIO, block_size: int) -> None:
+    """
+    Copy an open regular file into sink. On Linux, when the sink has a descriptor (e.g. a
+    pipe to ffplay), os.sendfile moves the bytes in-kernel without passing through Python.
+    """
+    try:
+        in_fd, out_fd = src.fileno(), sink.fileno()
+    except (AttributeError, OSError, ValueError):
+        out_fd = -1
+    if out_fd < 0 or not sys.platform.startswith("linux"):
+        _copy_blocks(src, sink, block_size)
+        return
+    try:
+        sink.flush()
+    except OSError as exc:
+        raise _SinkClosed() from exc
+    offset = src.tell()
+    while True:
+        try:
+            sent = os.sendfile(out_fd, in_fd, offset, block_size)
+        except BrokenPipeError as exc:
+            raise _SinkClosed() from exc
+        except OSError:
+            # This file/sink pair does not support sendfile; finish in user space.
+            src.seek(offset)
+            _copy_blocks(src, sink, block_size)
+            return
+        if not sent:
+            return
+        offset += sent
+
+
+def _get_http2_client() -> Optional["httpx.Client"]:
+    """
+    Return this process's HTTP/2 client when httpx and h2 are installed, else None.
+    Prefetches and playback then share one multiplexed connection instead of one socket each.
+    """
+    global _HTTP2, _HTTP2_PID
+    if httpx is None:
+        return None
+    pid = os.getpid()
+    with _POOL_LOCK:
+        if _HTTP2_PID != pid:
+            _HTTP2_PID = pid
+            parts = urlsplit(API_BASE)
+            try:
+                _HTTP2 = httpx.Client(
+                    http2=True,
+                    base_url=f"{parts.scheme}://{parts.netloc}",
+                    timeout=60.0,
+                    limits=httpx.Limits(max_connections=POOL_MAXSIZE, max_keepalive_connections=POOL_MAXSIZE),
+                )
+            except ImportError:  # httpx without the h2 extra
+                _HTTP2 = None
+        return _HTTP2
+
+
+def _get_pool() -> ConnectionPool:
+    """
+    Return this process's keep-alive pool to the API, so each utterance after the first
+    skips the TCP + TLS handshake. A forked child builds its own rather than sharing sockets.
+    """
+    global _POOL, _POOL_PID
+    pid = os.getpid()
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_PID != pid:
+            _POOL = ConnectionPool(API_BASE, maxsize=POOL_MAXSIZE, timeout=60.0)
+            _POOL_PID = pid
+        return _POOL
+
+
+def play_audio_bytes(
+    data: bytes, description: str | None = None, volume: float | None = None, low_latency: bool = True
+) -> None:
     """
     Play audio bytes using ffplay when available; otherwise save to temp and log path.
     """
@@ -125,7 +462,7 @@ def play_audio_bytes(data: bytes, description: str | None = None, volume: float
     if ffplay:
         try:
             result = subprocess.run(
-                _ffplay_command(ffplay, volume),
+                _ffplay_command(ffplay, volume, low_latency),
                 input=data,
                 check=False,
             )
@@ -133,49 +470,82 @@ def play_audio_bytes(data: bytes, description: str | None = None, volume: float
                 return
             logger.warning("ffplay exited with code %s; writing audio to a temp file", result.returncode)
         except FileNotFoundError:
+            _ffplay_path.cache_clear()
             logger.debug("ffplay not found at playback time; will fallback to file write")
         except Exception as exc:
             logger.warning("ffplay playback failed: %s; writing audio to a temp file", exc)
 
-    path = _write_temp_file(data)
-    if not path:
-        return
-
-    played = _attempt_play_with_retries(path, volume=volume)
-    if played:
+    if _auto_player_available():
+        # Deleted as soon as it has played, so the clip can live in RAM meanwhile.
+        path = _write_temp_file(data, directory=_ram_temp_dir(len(data)))
+        if not path:
+            return
+        played = _attempt_play_with_retries(path, volume=volume)
         _safe_remove(path)
-        return
+        if played:
+            return
 
-    logger.warning("Audio saved to %s (auto-play unavailable; play manually)", path)
+    # Left behind for manual playback: keep it on disk, not in tmpfs.
+    path = _write_temp_file(data)
+    if path:
+        logger.warning("Audio saved to %s (auto-play unavailable; play manually)", path)
 
 
-def play_audio_stream(chunks: Iterable[bytes], volume: float | None = None) -> None:
+def play_audio_stream(chunks: Iterable[bytes], volume: float | None = None, low_latency: bool = True) -> None:
     """
     Stream audio through ffplay if available; otherwise buffer then play once.
     """
     ffplay = _ffplay_path()
     if not ffplay:
         buffered = b"".join(chunks)
-        play_audio_bytes(buffered, volume=volume)
+        play_audio_bytes(buffered, volume=volume, low_latency=low_latency)
         return
 
+    def feed(stdin: BinaryIO) -> None:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            try:
+                stdin.write(chunk)
+            except BrokenPipeError:
+                logger.warning("ffplay pipe closed early")
+                break
+
+    _run_ffplay(_ffplay_command(ffplay, volume, low_latency), feed)
+
+
+def play_speech_stream(
+    client: ElevenLabsClient, text: str, volume: float | None = None, low_latency: bool = True
+) -> None:
+    """
+    Synthesize text and copy the streaming response straight into ffplay's stdin.
+    Without ffplay, synthesize the whole clip and play it once.
+    """
+    ffplay = _ffplay_path()
+    if not ffplay:
+        play_audio_bytes(client.speak_to_bytes(text), volume=volume, low_latency=low_latency)
+        return
+
+    def feed(stdin: BinaryIO) -> None:
+        if not client.pipe_to(text, stdin):
+            logger.warning("ffplay pipe closed early")
+
+    _run_ffplay(_ffplay_command(ffplay, volume, low_latency), feed)
+
+
+def _run_ffplay(command: list[str], feed: Callable[[BinaryIO], None]) -> None:
     proc: subprocess.Popen | None = None
-    command = _ffplay_command(ffplay, volume)
     try:
         proc = subprocess.Popen(
             command,
             stdin=subprocess.PIPE,
         )
-        for chunk in chunks:
-            if not chunk or not proc.stdin:
-                continue
+        if proc.stdin:
+            feed(proc.stdin)
             try:
-                proc.stdin.write(chunk)
+                proc.stdin.close()
             except BrokenPipeError:
-                logger.warning("ffplay pipe closed early")
-                break
-        if proc.stdin:
-            proc.stdin.close()
+                pass
         proc.wait()
     finally:
         if proc and proc.poll() is None:
@@ -183,35 +553,39 @@ def play_audio_stream(chunks: Iterable[bytes], volume: float | None = None) -> N
             proc.wait()
 
 
+@functools.cache
 def _ffplay_path() -> Optional[str]:
+    # Probed once per process; cleared if the binary disappears at playback time.
     path = shutil.which("ffplay")
-    if path:
+    if path or not sys.platform.startswith("win"):
         return path
-    # Try common Windows install location
-    candidates = [
-        r"C:\ffmpeg\ffmpeg-master-latest-win64-gpl\bin\ffplay.exe",
-        r"C:\Program Files\ffmpeg\bin\ffplay.exe",
-    ]
-    for cand in candidates:
-        if Path(cand).exists():
+    for cand in FFPLAY_WINDOWS_CANDIDATES:
+        if os.path.isfile(cand):
             return cand
     return None
 
 
-def _ffplay_command(ffplay: str, volume: float | None = None) -> list[str]:
-    volume_arg = _ffmpeg_volume_filter(volume)
+def _ffplay_command(ffplay: str, volume: float | None = None, low_latency: bool = True) -> list[str]:
     cmd = [ffplay, "-nodisp", "-autoexit", "-loglevel", "quiet"]
-    if volume_arg:
-        cmd.extend(["-af", volume_arg])
+    if low_latency:
+        # Skip the default probe/analyze buffering (~1 s or more) before playback starts.
+        cmd.extend(["-probesize", "32", "-analyzeduration", "0", "-fflags", "nobuffer", "-flags", "low_delay"])
+    cmd.extend(_ffplay_volume_args(volume))
     cmd.append("-")
     return cmd
 
 
-def _ffmpeg_volume_filter(volume: float | None) -> Optional[str]:
+def _ffplay_volume_args(volume: float | None) -> list[str]:
+    """
+    Attenuation uses ffplay's -volume (applied in the SDL mixer, no filtergraph);
+    only gains above 1.0 need the -af volume filter.
+    """
     if volume is None:
-        return None
+        return []
     normalized = _normalize_volume(volume)
-    return f"volume={normalized:.3f}"
+    if normalized <= 1.0:
+        return ["-volume", str(_volume_percent(normalized))]
+    return ["-af", f"volume={normalized:.3f}"]
 
 
 def _normalize_volume(volume: float) -> float:
@@ -242,9 +616,9 @@ def _ffplay_available() -> bool:
     return _ffplay_path() is not None
 
 
-def _write_temp_file(data: bytes) -> Optional[str]:
+def _write_temp_file(data: bytes, directory: Optional[str] = None) -> Optional[str]:
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3", dir=directory) as tmp:
             tmp.write(data)
             return tmp.name
     except Exception as exc:  # pragma: no cover - only logs
@@ -252,29 +626,27 @@ def _write_temp_file(data: bytes) -> Optional[str]:
         return None
 
 
+def _ram_temp_dir(size: int) -> Optional[str]:
+    """
+    /dev/shm (tmpfs) on Linux when it is writable and has room, for clips that are played
+    and deleted right away. None means the default temp dir.
+    """
+    if not sys.platform.startswith("linux") or not os.access(SHM_DIR, os.W_OK):
+        return None
+    try:
+        st = os.statvfs(SHM_DIR)
+    except OSError:
+        return None
+    return SHM_DIR if st.f_bavail * st.f_frsize > 2 * size else None
+
+
 def _auto_play_file(path: str, volume: float | None = None) -> bool:
     """
     Try to auto-play the saved file using platform tools.
     """
     if sys.platform.startswith("win"):
-        wm_volume = _volume_percent(volume)
-        # Windows Media Player COM object can handle mp3 playback.
-        if _run_playback(
-            [
-                "powershell",
-                "-NoProfile",
-                "-Command",
-                (
-                    "$p = New-Object -ComObject WMPlayer.OCX.7;"
-                    f"$p.URL = \"{path}\";"
-                    f"$p.settings.volume = {wm_volume};"
-                    "$p.controls.play();"
-                    "while ($p.playState -ne 1) { Start-Sleep -Milliseconds 200 };"
-                    "$p.close();"
-                ),
-            ],
-            "wmplayer COM",
-        ):
+        # MCI decodes mp3 in-process; no powershell or COM startup.
+        if _play_with_mci(path, volume=volume):
             return True
 
         return _run_playback(
@@ -303,6 +675,32 @@ def _auto_play_file(path: str, volume: float | None = None) -> bool:
     return False
 
 
+def _play_with_mci(path: str, volume: float | None = None) -> bool:
+    """
+    Play a file synchronously through the Windows MCI API (winmm.dll) via ctypes.
+    """
+    try:
+        mci = ctypes.windll.winmm.mciSendStringW  # type: ignore[attr-defined]
+    except (AttributeError, OSError):
+        return False
+    # Unique per thread so overlapping callers never close each other's device.
+    alias = f"leviathan_tts_{threading.get_ident()}"
+    err = mci(f'open "{path}" type mpegvideo alias {alias}', None, 0, None)
+    if err:
+        logger.debug("MCI could not open %s (error %s)", path, err)
+        return False
+    try:
+        if volume is not None:
+            # MCI volume is 0-1000 and cannot amplify past the original level.
+            mci(f"setaudio {alias} volume to {min(_volume_percent(volume), 100) * 10}", None, 0, None)
+        err = mci(f"play {alias} wait", None, 0, None)
+        if err:
+            logger.debug("MCI playback failed (error %s)", err)
+        return not err
+    finally:
+        mci(f"close {alias}", None, 0, None)
+
+
 def _run_playback(cmd: list[str], label: str) -> bool:
     try:
         result = subprocess.run(
@@ -332,14 +730,27 @@ def _safe_remove(path: str) -> None:
 
 
 def _attempt_play_with_retries(
-    path: str, attempts: int = 3, delay_seconds: float = 1.0, volume: float | None = None
+    path: str, attempts: int = 3, delay_seconds: float = 0.1, volume: float | None = None
 ) -> bool:
     """
-    Retry auto playback a few times to tolerate slow startup of platform players.
+    Retry auto playback a few times to tolerate slow startup of platform players,
+    tripling the delay each time (0.1 s, 0.3 s). Gives up at once if no player is installed.
     """
+    if not _auto_player_available():
+        return False
+    delay = delay_seconds
     for idx in range(attempts):
         if _auto_play_file(path, volume=volume):
             return True
         if idx < attempts - 1:
-            time.sleep(delay_seconds)
+            time.sleep(delay)
+            delay *= 3
     return False
+
+
+def _auto_player_available() -> bool:
+    if sys.platform.startswith("win"):
+        return hasattr(ctypes, "windll") or shutil.which("powershell") is not None
+    if sys.platform == "darwin":
+        return shutil.which("afplay") is not None
+    return any(shutil.which(name) for name in ("aplay", "paplay"))